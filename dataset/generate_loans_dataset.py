@@ -6,8 +6,14 @@ Generate it with a triangular distribution (0–40 years, mode ≈ 12) for reali
     Small positive effect of experience on approval score (configurable thresholds).
     Header updated to include experience
 """
-import csv, random, math, argparse
-from typing import List
+import csv, random, math, argparse, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from statistics_inferential.bin.rng_registry import RNGRegistry  # noqa: E402
 
 def fmt_currency(x: float) -> str:
     return f"${x:,.2f}"
@@ -27,40 +33,42 @@ LAST_NAMES = [
     "Lee","Perez","Thompson","White","Harris","Sanchez","Clark","Ramirez","Lewis","Robinson"
 ]
 
-def make_full_name(gender: str) -> str:
+def make_full_name(gender: str, rng: Optional[random.Random] = None) -> str:
+    rng = rng if rng is not None else random.Random()
     if gender == "male":
-        first = random.choice(MALE_FIRST)
+        first = rng.choice(MALE_FIRST)
     else:
-        first = random.choice(FEMALE_FIRST)
-    last = random.choice(LAST_NAMES)
+        first = rng.choice(FEMALE_FIRST)
+    last = rng.choice(LAST_NAMES)
     # ~30% chance for a middle initial
-    if random.random() < 0.30:
-        middle_initial = chr(ord('A') + random.randrange(26))
+    if rng.random() < 0.30:
+        middle_initial = chr(ord('A') + rng.randrange(26))
         return f"{first} {middle_initial}. {last}"
     return f"{first} {last}"
 
-def make_record(i: int) -> dict:
+def make_record(i: int, rng: Optional[random.Random] = None) -> dict:
+    rng = rng if rng is not None else random.Random()
     loan_id = f"ID{1000 + i}"
-    gender = random.choices(["male", "female"], weights=[0.52, 0.48], k=1)[0]
-    applicant = make_full_name(gender)
-    married = random.choices(["yes", "no"], weights=[0.62, 0.38], k=1)[0]
-    dependents = random.choices([0,1,2,3,4], weights=[0.36,0.28,0.18,0.12,0.06], k=1)[0]
-    self_employed = random.choices(["yes", "no"], weights=[0.15, 0.85], k=1)[0]
-    property_area = random.choices(["urban", "rural"], weights=[0.7, 0.3], k=1)[0]
-    credit_history = random.choices([1,0], weights=[0.75, 0.25], k=1)[0]
+    gender = rng.choices(["male", "female"], weights=[0.52, 0.48], k=1)[0]
+    applicant = make_full_name(gender, rng)
+    married = rng.choices(["yes", "no"], weights=[0.62, 0.38], k=1)[0]
+    dependents = rng.choices([0,1,2,3,4], weights=[0.36,0.28,0.18,0.12,0.06], k=1)[0]
+    self_employed = rng.choices(["yes", "no"], weights=[0.15, 0.85], k=1)[0]
+    property_area = rng.choices(["urban", "rural"], weights=[0.7, 0.3], k=1)[0]
+    credit_history = rng.choices([1,0], weights=[0.75, 0.25], k=1)[0]
 
     # --- NEW: Years of experience (0–40, mode around 12), a bit higher if self-employed
-    base_exp = random.triangular(0, 40, 12)  # float
+    base_exp = rng.triangular(0, 40, 12)  # float
     if self_employed == "yes":
-        base_exp += random.triangular(0, 5, 2)  # small bump
+        base_exp += rng.triangular(0, 5, 2)  # small bump
     experience = int(max(0, min(40, round(base_exp))))
 
     # Monthly income (log-normal for skew)
-    income = random.lognormvariate(math.log(5500), 0.45)
+    income = rng.lognormvariate(math.log(5500), 0.45)
     income = max(1800.0, min(income, 25000.0))
 
     # Loan term (months)
-    term = random.choices(
+    term = rng.choices(
         [12,24,36,48,60,120,180,240,360],
         weights=[3,5,12,15,20,15,10,8,7],
         k=1
@@ -68,7 +76,7 @@ def make_record(i: int) -> dict:
 
     # Loan amount tied to annual income
     annual_income = income * 12.0
-    ratio = random.uniform(0.08, 0.55)
+    ratio = rng.uniform(0.08, 0.55)
     loan_amount = max(500.0, min(ratio * annual_income, 250000.0))
 
     # Simple approval heuristic (for realism)
@@ -85,7 +93,7 @@ def make_record(i: int) -> dict:
         score += 0.10
     elif experience >= 5:
         score += 0.05
-    score += random.uniform(-0.2, 0.2)
+    score += rng.uniform(-0.2, 0.2)
 
     status = "Y" if score >= 0.4 else "N"
 
@@ -105,23 +113,49 @@ def make_record(i: int) -> dict:
         "status": status,
     }
 
-def generate_csv(path: str, n: int, seed: int = 42) -> None:
-    random.seed(seed)
-    headers = [
-        "loan_id","applicant","gender","married","dependents","self_employed",
-        "experience","income","loan_amount","term","credit_history","property_area","status"  # <-- updated header
-    ]
+HEADERS = [
+    "loan_id","applicant","gender","married","dependents","self_employed",
+    "experience","income","loan_amount","term","credit_history","property_area","status"  # <-- updated header
+]
+
+def make_shard(seed: int, shard: int, start: int, stop: int) -> List[dict]:
+    """Records start..stop-1 drawn from the shard's own named stream (see rng_registry)."""
+    rng = RNGRegistry(seed).python_random("loans", shard)
+    return [make_record(i, rng) for i in range(start, stop)]
+
+def generate_csv(path: str, n: int, seed: int = 42, shard_size: Optional[int] = None, workers: int = 1) -> None:
+    """
+    Write n records. By default one random.Random(seed) stream is used (reproduces the
+    committed CSVs). With shard_size, every block of shard_size rows has its own named stream,
+    so the blocks can be generated on `workers` processes and the file is bit-identical for
+    any worker count.
+    """
     with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
+        writer = csv.DictWriter(f, fieldnames=HEADERS)
         writer.writeheader()
-        for i in range(1, n+1):
-            writer.writerow(make_record(i))
+        if shard_size is None:
+            rng = random.Random(seed)
+            for i in range(1, n+1):
+                writer.writerow(make_record(i, rng))
+            return
+        starts = list(range(1, n+1, shard_size))
+        stops = [min(s + shard_size, n+1) for s in starts]
+        shards = list(range(len(starts)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for records in pool.map(make_shard, [seed] * len(shards), shards, starts, stops):
+                    writer.writerows(records)
+        else:
+            for shard, start, stop in zip(shards, starts, stops):
+                writer.writerows(make_shard(seed, shard, start, stop))
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Generate synthetic loans CSV.")
     ap.add_argument("--out", default="/workspaces/stats-foundations-python/dataset/loan_applications_2000.csv", help="output CSV path")
     ap.add_argument("--n", type=int, default=2000, help="number of rows")
     ap.add_argument("--seed", type=int, default=42, help="random seed")
+    ap.add_argument("--shard-size", type=int, default=None, help="rows per independently seeded shard (enables --workers)")
+    ap.add_argument("--workers", type=int, default=1, help="processes generating shards in parallel")
     args = ap.parse_args()
-    generate_csv(args.out, args.n, args.seed)
+    generate_csv(args.out, args.n, args.seed, args.shard_size, args.workers)
     print(f"✅ Wrote {args.n} rows to {args.out}")
@@ -1,4 +1,11 @@
+import sys
+from pathlib import Path
+
 import numpy as np
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from linear_algebra_01.vector_norms import row_norms  # noqa: E402
 x = np.array([25,2,5])
 
 # Transposing a regular 1-D array has no effect...
@@ -57,3 +64,7 @@ print(X[1,:])
 # Another slicing-by-index example:
 print(X[0:2, 0:2])
 
+
+# The same norms row-wise, for many vectors at once (float32, cache-sized chunks)
+for ord_ in (1, 2, "sq", np.inf):
+    print(f"row_norms(X, ord={ord_}) =", row_norms(X, ord=ord_))
@@ -1,15 +1,31 @@
+import argparse
+import sys
+from pathlib import Path
+
 import numpy as np
-import torch
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from linear_algebra_01.array_backend import BACKENDS, get_backend  # noqa: E402
+
+ap = argparse.ArgumentParser(description="Review: vectors and transposes in NumPy and another backend.")
+ap.add_argument("--backend", default="torch", choices=BACKENDS,
+                help="library for the second half (imported only when chosen; numpy skips it)")
+args = ap.parse_args()
+
 x = np.array([25, 2, 5])
 print(x)
 
 x_t = x.T
 print(x_t)
 
-x_p = torch.tensor([25, 2, 5])
-print(x_p)
-
-x_p_t = x_p.T
-print(x_p_t)
-
+try:
+    xp = get_backend(args.backend)
+except ImportError as exc:
+    print(f"Skipping the {args.backend} part: {exc}")
+else:
+    x_p = xp.array([25, 2, 5])
+    print(x_p)
 
+    x_p_t = xp.transpose(x_p)
+    print(x_p_t)
@@ -0,0 +1,172 @@
+"""
+Lazy Array Backends: NumPy, PyTorch, TensorFlow
+
+06_review_linear_algebra.py imports torch at the top, so even the NumPy half of the review pays
+for loading PyTorch (seconds and hundreds of MB); TensorFlow is heavier still. This module
+exposes the vector and matrix operations used in these scripts behind one interface and only
+imports a framework when its backend is first requested:
+
+Operation          numpy                  torch                        tensorflow
+array(data)        np.asarray             torch.as_tensor              tf.convert_to_tensor
+transpose(x)       x.T                    x.permute(reversed dims)     tf.transpose
+norm(x, ord)       np.linalg.norm         torch.linalg.vector_norm     tf.norm
+dot(x, y)          np.dot                 torch.dot / matmul           tf.tensordot
+matmul(a, b)       a @ b                  a @ b                        tf.matmul
+zeros(shape)       np.zeros               torch.zeros                  tf.zeros
+to_numpy(x)        np.asarray             x.cpu().numpy()              x.numpy()
+(slicing)          x[i, :] works natively on all three
+
+    xp = get_backend()            # numpy (or $ARRAY_BACKEND); torch/tensorflow never imported
+    xp = get_backend("torch")     # imports torch now; raises ImportError if it is not installed
+
+Tensors are created on the CPU; for TensorFlow, GPUs are hidden when the backend loads.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+import importlib.util
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BACKENDS = ("numpy", "torch", "tensorflow")
+
+_LOADED: Dict[str, "Backend"] = {}
+
+
+class Backend:
+    """Vector/matrix operations of one array library, imported on construction."""
+
+    def __init__(self, name: str):
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend: {name!r} (choose from {BACKENDS})")
+        if importlib.util.find_spec(name) is None:
+            raise ImportError(f"The {name!r} backend needs the {name} package, which is not installed.")
+        if name == "tensorflow":
+            os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+        self.name = name
+        self.lib = importlib.import_module(name)
+        if name == "tensorflow":
+            self.lib.config.set_visible_devices([], "GPU")
+
+    def __repr__(self) -> str:
+        return f"Backend({self.name!r})"
+
+    def array(self, data, dtype=None):
+        if self.name == "numpy":
+            return np.asarray(data, dtype=dtype)
+        if self.name == "torch":
+            return self.lib.as_tensor(data, dtype=dtype, device="cpu")
+        return self.lib.convert_to_tensor(data, dtype=dtype)
+
+    def zeros(self, shape, dtype=None):
+        if self.name == "numpy":
+            return np.zeros(shape, dtype=dtype or float)
+        if self.name == "torch":
+            return self.lib.zeros(shape, dtype=dtype, device="cpu")
+        return self.lib.zeros(shape, dtype=dtype or self.lib.float32)
+
+    def transpose(self, x):
+        if self.name == "numpy":
+            return x.T
+        if self.name == "torch":
+            return x.permute(*reversed(range(x.ndim)))
+        return self.lib.transpose(x)
+
+    def _float(self, x):
+        if self.name == "torch" and not x.is_floating_point():
+            return x.to(self.lib.float64)
+        if self.name == "tensorflow" and not x.dtype.is_floating:
+            return self.lib.cast(x, self.lib.float64)
+        return x
+
+    def _ravel(self, x):
+        if self.name == "numpy":
+            return np.ravel(x)
+        if self.name == "torch":
+            return x.reshape(-1)
+        return self.lib.reshape(x, [-1])
+
+    def norm(self, x, ord=2):
+        """
+        Vector norm: ord = 2 (L2), 1 (L1), np.inf (max norm) or "sq" (squared L2).
+
+        Matrices are flattened first on every backend (like torch.linalg.vector_norm), so
+        NumPy does not switch to its spectral / induced matrix norms.
+        """
+        x = self._ravel(x)
+        if ord == "sq":
+            return self.dot(x, x)
+        if self.name == "numpy":
+            return np.linalg.norm(x, ord=ord)
+        if self.name == "torch":
+            return self.lib.linalg.vector_norm(self._float(x), ord=ord)
+        return self.lib.norm(self._float(x), ord=ord)
+
+    def dot(self, x, y):
+        if self.name == "numpy":
+            return np.dot(x, y)
+        if self.name == "torch":
+            return self.lib.dot(x, y) if x.ndim == 1 and y.ndim == 1 else self.lib.matmul(x, y)
+        return self.lib.tensordot(x, y, axes=1)
+
+    def matmul(self, a, b):
+        return self.lib.matmul(a, b) if self.name == "tensorflow" else a @ b
+
+    def to_numpy(self, x) -> np.ndarray:
+        if self.name == "numpy":
+            return np.asarray(x)
+        if self.name == "torch":
+            return x.detach().cpu().numpy()
+        return x.numpy()
+
+
+def available_backends() -> List[str]:
+    """Backends whose package is installed (checked without importing it)."""
+    return [name for name in BACKENDS if importlib.util.find_spec(name) is not None]
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """Backend by name (default: $ARRAY_BACKEND or numpy), imported once and cached."""
+    name = (name or os.environ.get("ARRAY_BACKEND") or "numpy").lower()
+    name = {"pytorch": "torch", "tf": "tensorflow", "np": "numpy"}.get(name, name)
+    if name not in _LOADED:
+        _LOADED[name] = Backend(name)
+    return _LOADED[name]
+
+
+if __name__ == "__main__":
+    import subprocess
+
+    ap = argparse.ArgumentParser(description="Measure interpreter startup per backend.")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    args = ap.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    snippets = {
+        "numpy via array_backend": "from linear_algebra_01 import array_backend as ab; xp = ab.get_backend(); xp.norm(xp.array([25, 2, 5]))",
+        "import numpy, torch (old 06_review)": "import numpy, torch",
+        "torch via array_backend": "from linear_algebra_01 import array_backend as ab; xp = ab.get_backend('torch'); xp.norm(xp.array([25, 2, 5]))",
+        "import tensorflow": "import tensorflow",
+    }
+    installed = set(available_backends())
+    print(f"Installed backends: {', '.join(sorted(installed))}")
+    for label, code in snippets.items():
+        missing = [b for b in ("torch", "tensorflow") if b in code and b not in installed]
+        if missing:
+            print(f"{label:38s} skipped ({missing[0]} not installed)")
+            continue
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                           stderr=subprocess.DEVNULL)   # framework start-up logs
+            times.append(time.perf_counter() - t0)
+        print(f"{label:38s} {min(times) * 1e3:8.0f} ms (best of {args.repeat} fresh interpreters)")
+
+    xp = get_backend()
+    heavy = [m for m in ("torch", "tensorflow") if m in sys.modules]
+    print(f"After get_backend() here: norm = {xp.norm(xp.array([25, 2, 5])):.4f}, heavy frameworks imported: {heavy or 'none'}")
@@ -0,0 +1,264 @@
+"""
+Batched Vector Norms, Pairwise Distances and Nearest Neighbours
+
+05_vector_transportation.py computes the L1, L2, squared-L2 and max norms of one 3-vector by
+hand. For millions of embedding vectors (rows of an (n, d) matrix) the same quantities are
+computed here row-wise:
+
+Function              Computes                              How
+row_norms             L1, L2, squared L2 or max norm        float32, chunks of rows sized to
+                      of every row                          the CPU cache (chunk_bytes)
+pairwise_distances    Euclidean, squared Euclidean or       ||a||² + ||b||² - 2 a·b, one BLAS
+                      cosine distance, (n_a, n_b)           sgemm per block of rows
+cosine_similarity     a·b / (||a|| ||b||), (n_a, n_b)       rows normalized once, then blocks
+top_k_neighbors       k nearest base rows of each query     blocked distances, argpartition per
+                                                            block, running merge of candidates
+
+Inputs may be arrays, np.memmap or .npy paths (opened memory-mapped), so only one chunk of
+rows is resident at a time; large distance matrices can be written to a memmapped .npy.
+
+The expansion ||a - b||² = ||a||² + ||b||² - 2 a·b is fast but cancels catastrophically in
+float32 when the norms are large relative to the distances (data far from the origin). Euclidean
+distances are translation invariant, so both sides are first shifted by the float64 column mean
+of the base rows. top_k_neighbors also keeps oversample * k candidates from the expansion and
+re-ranks them with exact float64 distances before cutting to k.
+"""
+
+import os
+import time
+import argparse
+from typing import Optional, Union
+
+import numpy as np
+
+Source = Union[str, np.ndarray]
+NORMS = (1, 2, np.inf, "sq")
+METRICS = ("euclidean", "sqeuclidean", "cosine")
+
+
+def _open(source: Source) -> np.ndarray:
+    x = np.load(source, mmap_mode="r") if isinstance(source, str) else source
+    if not isinstance(x, np.ndarray):
+        x = np.asarray(x)
+    if x.ndim != 2:
+        raise ValueError(f"Expected a 2-D array (vectors x dimensions), got shape {x.shape}.")
+    return x
+
+
+def _chunk_rows(d: int, itemsize: int, chunk_bytes: int) -> int:
+    return max(1, chunk_bytes // max(1, d * itemsize))
+
+
+def row_norms(source: Source, ord=2, dtype=np.float32, chunk_bytes: int = 1 << 20) -> np.ndarray:
+    """Norm of every row: ord = 1, 2, np.inf (max norm) or "sq" (squared L2)."""
+    if not any(ord is o or ord == o for o in NORMS):
+        raise ValueError(f"Unknown norm: {ord!r} (choose from {NORMS})")
+    x = _open(source)
+    out = np.empty(x.shape[0], dtype=dtype)
+    step = _chunk_rows(x.shape[1], np.dtype(dtype).itemsize, chunk_bytes)
+    for start in range(0, x.shape[0], step):
+        chunk = np.asarray(x[start:start + step], dtype=dtype)
+        if ord == 1:
+            out[start:start + step] = np.abs(chunk).sum(axis=1)
+        elif ord == np.inf:
+            out[start:start + step] = np.maximum(chunk.max(axis=1), -chunk.min(axis=1))
+        else:
+            sq = np.einsum("ij,ij->i", chunk, chunk)
+            out[start:start + step] = sq if ord == "sq" else np.sqrt(sq)
+    return out
+
+
+def _column_mean(x: np.ndarray, chunk_bytes: int = 1 << 24) -> np.ndarray:
+    """Column means in float64, one pass over chunks of rows."""
+    total = np.zeros(x.shape[1])
+    step = _chunk_rows(x.shape[1], 8, chunk_bytes)
+    for start in range(0, x.shape[0], step):
+        total += np.asarray(x[start:start + step], dtype=float).sum(axis=0)
+    return total / max(1, x.shape[0])
+
+
+def _block_distances(a: np.ndarray, a_sq: np.ndarray, b: np.ndarray, b_sq: np.ndarray, metric: str) -> np.ndarray:
+    if metric == "cosine":
+        return 1.0 - a @ b.T                      # rows already normalized
+    dist = a @ b.T
+    dist *= -2.0
+    dist += a_sq[:, None]
+    dist += b_sq[None, :]
+    np.maximum(dist, 0.0, out=dist)
+    return dist if metric == "sqeuclidean" else np.sqrt(dist, out=dist)
+
+
+def _prepared(x: np.ndarray, metric: str, dtype, shift: Optional[np.ndarray] = None) -> tuple:
+    if shift is not None:
+        x = np.asarray(x, dtype=float) - shift
+    x = np.asarray(x, dtype=dtype)
+    sq = np.einsum("ij,ij->i", x, x)
+    if metric == "cosine":
+        norms = np.sqrt(sq)
+        norms[norms == 0] = 1.0
+        return x / norms[:, None], sq
+    return x, sq
+
+
+def pairwise_distances(a: Source, b: Optional[Source] = None, metric: str = "euclidean",
+                       block_rows: int = 2048, dtype=np.float32, out: Optional[str] = None) -> np.ndarray:
+    """(n_a, n_b) distances between rows of a and b (b = a if omitted), block by block."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric!r} (choose from {METRICS})")
+    a = _open(a)
+    same = b is None
+    b = a if same else _open(b)
+    if a.shape[1] != b.shape[1]:
+        raise ValueError(f"Dimension mismatch: {a.shape[1]} vs {b.shape[1]}.")
+    result = (np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=(a.shape[0], b.shape[0])) if out
+              else np.empty((a.shape[0], b.shape[0]), dtype=dtype))
+    shift = None if metric == "cosine" else _column_mean(b)
+    for j0 in range(0, b.shape[0], block_rows):
+        bj, bj_sq = _prepared(b[j0:j0 + block_rows], metric, dtype, shift)
+        for i0 in range(0, a.shape[0], block_rows):
+            ai, ai_sq = _prepared(a[i0:i0 + block_rows], metric, dtype, shift)
+            block = _block_distances(ai, ai_sq, bj, bj_sq, metric)
+            if same and i0 == j0 and metric != "cosine":
+                np.fill_diagonal(block, 0.0)      # exact zeros instead of expansion round-off
+            result[i0:i0 + block_rows, j0:j0 + block_rows] = block
+    if isinstance(result, np.memmap):
+        result.flush()
+    return result
+
+
+def cosine_similarity(a: Source, b: Optional[Source] = None, block_rows: int = 2048, dtype=np.float32,
+                      out: Optional[str] = None) -> np.ndarray:
+    """(n_a, n_b) cosine similarities; zero vectors get similarity 0."""
+    sim = pairwise_distances(a, b, metric="cosine", block_rows=block_rows, dtype=dtype, out=out)
+    for i0 in range(0, sim.shape[0], block_rows):
+        sim[i0:i0 + block_rows] = 1.0 - sim[i0:i0 + block_rows]
+    return sim
+
+
+def top_k_neighbors(queries: Source, base: Source, k: int, metric: str = "euclidean",
+                    block_rows: int = 8192, query_block: int = 1024, dtype=np.float32,
+                    exclude_self: bool = False, oversample: int = 4) -> tuple:
+    """
+    The k nearest base rows of every query row: (indices, distances), each (n_queries, k), sorted.
+
+    Distances use the blocked BLAS expansion (on mean-centered rows) to select oversample * k
+    candidates, which are then re-ranked by exact float64 distances. exclude_self drops base
+    row i for query i (queries and base being the same matrix).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric!r} (choose from {METRICS})")
+    q_all, base = _open(queries), _open(base)
+    n_base = base.shape[0]
+    if not 1 <= k <= n_base - int(exclude_self):
+        raise ValueError(f"k must be between 1 and {n_base - int(exclude_self)}, got {k}.")
+    if oversample < 1:
+        raise ValueError(f"oversample must be >= 1, got {oversample}.")
+    fetch = min(k * oversample, n_base - int(exclude_self))
+    shift = None if metric == "cosine" else _column_mean(base)
+    indices = np.empty((q_all.shape[0], k), dtype=np.int64)
+    distances = np.empty((q_all.shape[0], k))
+    for q0 in range(0, q_all.shape[0], query_block):
+        q, q_sq = _prepared(q_all[q0:q0 + query_block], metric, dtype, shift)
+        rows = np.arange(q.shape[0])[:, None]
+        best_d = np.full((q.shape[0], 0), np.inf, dtype=dtype)
+        best_i = np.empty((q.shape[0], 0), dtype=np.int64)
+        for b0 in range(0, n_base, block_rows):
+            bb, bb_sq = _prepared(base[b0:b0 + block_rows], metric, dtype, shift)
+            d = _block_distances(q, q_sq, bb, bb_sq, "sqeuclidean" if metric == "euclidean" else metric)
+            if exclude_self:
+                own = np.arange(q0, q0 + q.shape[0]) - b0
+                hit = (own >= 0) & (own < bb.shape[0])
+                d[np.flatnonzero(hit), own[hit]] = np.inf
+            cand_d = np.concatenate([best_d, d], axis=1)
+            cand_i = np.concatenate([best_i, np.broadcast_to(np.arange(b0, b0 + bb.shape[0]), d.shape)], axis=1)
+            if cand_d.shape[1] > fetch:
+                keep = np.argpartition(cand_d, fetch - 1, axis=1)[:, :fetch]
+                cand_d, cand_i = cand_d[rows, keep], cand_i[rows, keep]
+            best_d, best_i = cand_d, cand_i
+
+        # Exact distances for the candidates, then keep the k best
+        q64 = np.asarray(q_all[q0:q0 + query_block], dtype=float)
+        winners = np.unique(best_i)
+        vecs = np.asarray(base[winners], dtype=float)[np.searchsorted(winners, best_i)]   # (q, fetch, d)
+        if metric == "cosine":
+            qn = q64 / np.maximum(np.linalg.norm(q64, axis=1, keepdims=True), 1e-300)
+            vn = vecs / np.maximum(np.linalg.norm(vecs, axis=2, keepdims=True), 1e-300)
+            exact = 1.0 - np.einsum("qd,qkd->qk", qn, vn)
+        else:
+            exact = np.einsum("qkd,qkd->qk", vecs - q64[:, None, :], vecs - q64[:, None, :])
+            if metric == "euclidean":
+                exact = np.sqrt(exact)
+        order = np.argsort(exact, axis=1, kind="stable")[:, :k]
+        indices[q0:q0 + query_block] = best_i[rows, order]
+        distances[q0:q0 + query_block] = exact[rows, order]
+    return indices, distances
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    ap = argparse.ArgumentParser(description="Benchmark batched norms, distances and top-k neighbours.")
+    ap.add_argument("--rows", type=int, default=10_000_000, help="embedding vectors (memmapped)")
+    ap.add_argument("--dim", type=int, default=64, help="dimensions")
+    ap.add_argument("--base", type=int, default=1_000_000, help="base vectors for top-k")
+    ap.add_argument("--queries", type=int, default=1000, help="query vectors for top-k")
+    ap.add_argument("--k", type=int, default=10, help="neighbours")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.npy")
+    emb = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(args.rows, args.dim))
+    for start in range(0, args.rows, 1_000_000):
+        m = min(1_000_000, args.rows - start)
+        emb[start:start + m] = rng.standard_normal((m, args.dim), dtype=np.float32)
+    emb.flush()
+    del emb
+    x = np.load(path, mmap_mode="r")
+    print(f"{args.rows:,} x {args.dim} float32 embeddings, memmapped ({x.nbytes / 1e9:.2f} GB)")
+
+    for ord_ in (1, 2, "sq", np.inf):
+        t0 = time.perf_counter()
+        norms = row_norms(x, ord=ord_)
+        print(f"row_norms(ord={ord_!s:3s}): {time.perf_counter() - t0:5.2f}s "
+              f"({args.rows / (time.perf_counter() - t0) / 1e6:.0f}M rows/s)")
+    head = np.asarray(x[:1_000_000])
+    t0 = time.perf_counter()
+    ref = np.linalg.norm(head, axis=1)
+    t_np = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ours = row_norms(head)
+    print(f"1M rows in memory: np.linalg.norm(axis=1) {t_np:.3f}s, row_norms {time.perf_counter() - t0:.3f}s, "
+          f"max rel. diff {np.abs(ours / ref - 1).max():.1e}")
+
+    sample = np.asarray(x[:2000], dtype=float)
+    exact = np.sqrt(((sample[:, None, :] - sample[None, :, :]) ** 2).sum(-1))
+    print(f"pairwise_distances 2000 x 2000: max |diff| vs float64 broadcast = "
+          f"{np.abs(pairwise_distances(sample.astype(np.float32)) - exact).max():.1e}")
+
+    base = x[: args.base]
+    queries = np.asarray(x[args.base: args.base + args.queries])
+    t0 = time.perf_counter()
+    idx, dist = top_k_neighbors(queries, base, args.k)
+    elapsed = time.perf_counter() - t0
+    print(f"top_k_neighbors: {args.queries:,} queries x {args.base:,} base, k = {args.k}: {elapsed:.1f}s "
+          f"({args.queries * args.base / elapsed / 1e6:.0f}M distances/s)")
+
+    small = np.asarray(base[:50_000], dtype=float)
+    for metric in ("euclidean", "cosine"):
+        idx, _ = top_k_neighbors(queries[:20], small, args.k, metric=metric, block_rows=4096)
+        if metric == "euclidean":
+            brute = ((small[None, :, :] - queries[:20, None, :].astype(float)) ** 2).sum(-1)
+        else:
+            unit = small / np.linalg.norm(small, axis=1, keepdims=True)
+            qn = queries[:20] / np.linalg.norm(queries[:20], axis=1, keepdims=True)
+            brute = 1.0 - qn @ unit.T
+        print(f"{metric}: matches float64 brute force on 20 queries x 50,000 base: "
+              f"{np.array_equal(np.argsort(brute, axis=1)[:, :args.k], idx)}")
+
+    shifted = (small[:5000] + 1000.0).astype(np.float32)
+    near = (queries[:20] + 1000.0).astype(np.float32)
+    idx, _ = top_k_neighbors(near, shifted, args.k)
+    brute = ((shifted[None, :, :].astype(float) - near[:, None, :].astype(float)) ** 2).sum(-1)
+    print(f"data offset by 1000 (float32): matches float64 brute force on 20 queries x 5,000 base: "
+          f"{np.array_equal(np.argsort(brute, axis=1)[:, :args.k], idx)}")
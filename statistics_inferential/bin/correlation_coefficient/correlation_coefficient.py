@@ -1,5 +1,16 @@
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.correlation_coefficient.rank_correlation import spearman_matrix, kendall_tau_b  # noqa: E402
 data = pd.DataFrame({'Height': [160, 165, 170, 175, 180], 'Weight': [60, 65, 70, 75, 80]})
 corr = np.corrcoef(data['Height'], data['Weight'])[0, 1]
-print(f"Correlation Coefficient: {corr:.2f}")
\ No newline at end of file
+print(f"Correlation Coefficient: {corr:.2f}")
+
+# Rank correlations: robust to skew and outliers (only the order of the values matters)
+print(f"Spearman rho: {spearman_matrix(data).loc['Height', 'Weight']:.2f}")
+print(f"Kendall tau-b: {kendall_tau_b(data['Height'], data['Weight'])['tau_b']:.2f}")
@@ -0,0 +1,108 @@
+"""
+Rank Correlations: Spearman Matrix and Kendall Tau-b
+
+correlation_coefficient.py and show_how_strong_or_weak_two_variables_correlated.py use Pearson's r,
+which a few extreme incomes can dominate. Rank correlations only use the order of the values:
+
+Function          Cost                     How
+spearman_matrix   p sorts + one X^T X      rank every column once (average ranks for ties),
+                                           then Pearson on the ranks with a single BLAS product
+kendall_tau_b     O(n log n)               drop rows where x or y is NaN, then
+                                           scipy.stats.kendalltau(variant="b") (Knight's
+                                           merge-sort algorithm, compiled)
+
+A naive Kendall loop over all n(n-1)/2 pairs is 5e13 comparisons for 10M rows; scipy's
+O(n log n) implementation takes seconds. kendall_tau_b only adds NaN handling and returns a
+plain dict like the other helpers here.
+"""
+
+import time
+import argparse
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def rank_columns(x: np.ndarray) -> np.ndarray:
+    """Average ranks (1..n, ties share their mean rank) of every column, one column at a time."""
+    x = np.asarray(x, dtype=float)
+    n = x.shape[0]
+    ranks = np.empty(x.shape)
+    for j in range(x.shape[1]):
+        order = np.argsort(x[:, j])
+        values = x[order, j]
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        ends = np.r_[starts[1:], n]
+        ranks[order, j] = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    return ranks
+
+
+def spearman_matrix(data: Union[pd.DataFrame, np.ndarray]) -> Union[pd.DataFrame, np.ndarray]:
+    """
+    Spearman correlation of every pair of columns, same as df.dropna().corr(method="spearman").
+
+    Rows with any NaN are dropped first (listwise), so every pair is ranked over the same rows.
+    """
+    columns = data.columns if isinstance(data, pd.DataFrame) else None
+    x = np.asarray(data, dtype=float)
+    if x.ndim != 2:
+        raise ValueError(f"Expected a 2-D array (rows x variables), got shape {x.shape}.")
+    x = x[~np.isnan(x).any(axis=1)]
+    ranks = rank_columns(x)
+    ranks -= (x.shape[0] + 1) / 2.0       # the mean of average ranks is always (n + 1) / 2
+    comoment = ranks.T @ ranks
+    d = np.sqrt(np.diag(comoment))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = comoment / np.outer(d, d)
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, np.where(d > 0, 1.0, np.nan))
+    return corr if columns is None else pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def kendall_tau_b(x, y) -> dict:
+    """Kendall's tau-b with tie corrections and its two-sided p-value, over pairwise-complete rows."""
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    if x.size != y.size:
+        raise ValueError(f"x and y must have the same length, got {x.size} and {y.size}.")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    if x.size < 2:
+        return {"tau_b": np.nan, "pvalue": np.nan, "n": int(x.size)}
+    res = stats.kendalltau(x, y, variant="b")
+    return {"tau_b": float(res.statistic), "pvalue": float(res.pvalue), "n": int(x.size)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark rank correlations on large samples.")
+    ap.add_argument("--rows", type=int, default=10_000_000, help="rows per pair")
+    ap.add_argument("--p", type=int, default=10, help="columns for the Spearman matrix")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    age = np.clip(rng.normal(38, 12, args.rows).round(), 18, 75)                 # heavily tied
+    income = np.exp(rng.normal(np.log(60_000), 0.5, args.rows) + 0.01 * (age - 38)).round(-2)
+
+    t0 = time.perf_counter()
+    res = kendall_tau_b(age, income)
+    t_tau = time.perf_counter() - t0
+    print(f"Kendall tau-b, {args.rows:,} rows (Age x Income, ties in both): "
+          f"{res['tau_b']:.6f} (p = {res['pvalue']:.3g}) in {t_tau:.1f}s")
+    print(f"Naive pairwise loop would compare {args.rows * (args.rows - 1) // 2:.2e} pairs")
+
+    gappy = income.copy()
+    gappy[::10] = np.nan
+    print(f"With 10% of incomes missing: tau-b {kendall_tau_b(age, gappy)['tau_b']:.6f} on the complete pairs")
+
+    x = np.column_stack([income, age] + [income ** (k / 10) + rng.normal(0, 50, args.rows) for k in range(1, args.p - 1)])
+    t0 = time.perf_counter()
+    ours = spearman_matrix(x)
+    t_ours = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    theirs = pd.DataFrame(x).corr(method="spearman").to_numpy()
+    t_pandas = time.perf_counter() - t0
+    print(f"Spearman {args.p}x{args.p} matrix, {args.rows:,} rows: {t_ours:.1f}s; df.corr(method='spearman') {t_pandas:.1f}s, "
+          f"max |diff| = {np.abs(ours - theirs).max():.1e}")
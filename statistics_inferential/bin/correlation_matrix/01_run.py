@@ -1,8 +1,15 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.matrix_heatmap import matrix_heatmap  # noqa: E402
+from statistics_inferential.bin.correlation_matrix.correlation_pvalues import significant_pairs  # noqa: E402
+
 # ---------- 1) Generate a synthetic customers.csv ----------
 np.random.seed(42)
 n = 500
@@ -35,8 +42,11 @@ df_selected = df[features].dropna()
 corr_matrix = df_selected.corr()
 print("\n🔗 Correlation Matrix:\n", corr_matrix)
 
+# Which correlations are significant? (t-test on every pair, Holm-adjusted)
+print("\nSignificant pairs (Holm, alpha = 0.05):\n", significant_pairs(df_selected, alpha=0.05, method="holm"))
+
 plt.figure(figsize=(6,4))
-sns.heatmap(corr_matrix, annot=True, cmap='coolwarm')
+matrix_heatmap(corr_matrix, cmap='coolwarm', center=0.0)  # annotated in full for small p
 plt.title("Correlation Matrix")
 plt.tight_layout()
 plt.show()
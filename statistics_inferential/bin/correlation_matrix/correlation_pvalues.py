@@ -0,0 +1,146 @@
+"""
+Correlation-Matrix p-Values with Multiple-Testing Correction
+
+Testing every pair of 01_run.py's variables with scipy.stats.pearsonr is p(p - 1)/2 Python
+calls - 12.5 million for 5,000 variables. Under H0 (rho = 0) the sample correlation gives
+
+    t = r sqrt((n - 2) / (1 - r²))  ~  Student t with n - 2 degrees of freedom
+
+so all p-values follow from the correlation matrix in one vectorized pass over its upper
+triangle (scipy.special.stdtr, the t CDF; identical to pearsonr's p-value). n may be a matrix
+of pairwise-complete counts (pairwise_complete.pairwise_counts) when data has gaps.
+
+With millions of tests, about alpha of the true-null pairs look significant by chance, so the
+p-values are adjusted across the upper triangle:
+
+Method       Controls                                 Adjusted p (sorted p_(1) <= ... <= p_(m))
+bonferroni   family-wise error rate                   min(1, m p_(i))
+holm         family-wise error rate (uniformly        max over j <= i of min(1, (m - j + 1) p_(j))
+             more powerful than Bonferroni)
+bh           false discovery rate (Benjamini-         min over j >= i of min(1, m p_(j) / j)
+             Hochberg)
+
+significant_pairs() returns only the pairs that survive, as a long table.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.correlation_matrix.pairwise_complete import pairwise_corr, pairwise_counts  # noqa: E402
+
+ADJUSTMENTS = ("bh", "holm", "bonferroni", "none")
+
+
+def correlation_pvalues(r, n) -> tuple:
+    """Two-sided t statistics and p-values for correlations r from n observations (elementwise)."""
+    r = np.asarray(r, dtype=float)
+    df = np.asarray(n, dtype=float) - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt(df / ((1.0 - r) * (1.0 + r)))
+        p = 2.0 * special.stdtr(df, -np.abs(t))
+    p = np.where(np.abs(r) >= 1.0, 0.0, p)
+    p = np.where(np.isnan(r) | (df <= 0), np.nan, p)
+    return t, np.minimum(p, 1.0)
+
+
+def adjust_pvalues(p, method: str = "bh") -> np.ndarray:
+    """Adjusted p-values for a 1-D array of tests (NaNs are ignored and stay NaN)."""
+    if method not in ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment: {method!r} (choose from {ADJUSTMENTS})")
+    p = np.asarray(p, dtype=float)
+    out = np.full(p.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p))
+    m = valid.size
+    if m == 0 or method == "none":
+        out[valid] = p[valid]
+        return out
+    if method == "bonferroni":
+        out[valid] = np.minimum(p[valid] * m, 1.0)
+        return out
+    order = valid[np.argsort(p[valid], kind="stable")]
+    ranked = p[order]
+    rank = np.arange(1, m + 1)
+    if method == "holm":
+        adjusted = np.maximum.accumulate(np.minimum(ranked * (m - rank + 1), 1.0))
+    else:
+        adjusted = np.minimum.accumulate((ranked * m / rank)[::-1])[::-1]
+    out[order] = np.minimum(adjusted, 1.0)
+    return out
+
+
+def significant_pairs(data: Optional[Union[pd.DataFrame, np.ndarray]] = None, corr=None, n=None,
+                      alpha: float = 0.05, method: str = "bh",
+                      columns: Optional[Sequence] = None) -> pd.DataFrame:
+    """
+    Pairs whose adjusted p-value is below alpha, most significant first.
+
+    Pass raw `data` (pairwise-complete Pearson correlations and counts are computed), or a
+    precomputed `corr` matrix with its sample size `n` (scalar or matrix of pair counts).
+    """
+    if data is not None:
+        columns = data.columns if isinstance(data, pd.DataFrame) and columns is None else columns
+        corr, n = np.asarray(pairwise_corr(data)), np.asarray(pairwise_counts(data))
+    elif corr is None or n is None:
+        raise ValueError("Pass either data, or corr together with n.")
+    else:
+        columns = corr.columns if isinstance(corr, pd.DataFrame) and columns is None else columns
+        corr = np.asarray(corr, dtype=float)
+    p = corr.shape[0]
+    columns = np.asarray(columns if columns is not None else np.arange(p))
+    i, j = np.triu_indices(p, 1)
+    r = corr[i, j]
+    n_pair = np.broadcast_to(np.asarray(n, dtype=float), corr.shape)[i, j]
+    t, pvalue = correlation_pvalues(r, n_pair)
+    adjusted = adjust_pvalues(pvalue, method)
+    keep = np.flatnonzero(adjusted < alpha)
+    keep = keep[np.lexsort((-np.abs(r[keep]), adjusted[keep]))]
+    return pd.DataFrame({"var_i": columns[i[keep]], "var_j": columns[j[keep]], "r": r[keep],
+                         "n": n_pair[keep].astype(np.int64), "t": t[keep], "p": pvalue[keep],
+                         "p_adj": adjusted[keep]}).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from scipy import stats
+
+    ap = argparse.ArgumentParser(description="Benchmark whole-matrix correlation tests.")
+    ap.add_argument("--rows", type=int, default=500, help="observations")
+    ap.add_argument("--p", type=int, default=5000, help="variables")
+    ap.add_argument("--alpha", type=float, default=0.05, help="significance level after adjustment")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    x = rng.standard_normal((args.rows, args.p))
+    x[:, : args.p // 10] += rng.standard_normal((args.rows, 1)) * 0.5      # one correlated block
+    names = np.array([f"v{j}" for j in range(args.p)])
+
+    t0 = time.perf_counter()
+    corr = np.corrcoef(x, rowvar=False)
+    t_corr = time.perf_counter() - t0
+    print(f"{args.p:,} variables, {args.p * (args.p - 1) // 2:,} pairs, n = {args.rows}")
+    for method in ("bh", "holm", "none"):
+        t0 = time.perf_counter()
+        table = significant_pairs(corr=corr, n=args.rows, alpha=args.alpha, method=method, columns=names)
+        print(f"{method:5s}: {len(table):9,} significant pairs, tests + adjustment {time.perf_counter() - t0:.1f}s "
+              f"(+ {t_corr:.1f}s for the correlation matrix)")
+
+    pairs = rng.integers(0, args.p, (200, 2))
+    t0 = time.perf_counter()
+    ref = np.array([stats.pearsonr(x[:, a], x[:, b]).pvalue for a, b in pairs])
+    per_call = (time.perf_counter() - t0) / len(pairs)
+    _, ours = correlation_pvalues(corr[pairs[:, 0], pairs[:, 1]], args.rows)
+    print(f"vs pearsonr on 200 pairs: max |diff| = {np.abs(ours - ref).max():.1e}; "
+          f"looping pearsonr over all pairs would take ~{per_call * args.p * (args.p - 1) / 2 / 60:.0f} min")
+
+    p_test = rng.random(1000) ** 3
+    print(f"BH matches scipy.stats.false_discovery_control: "
+          f"{np.allclose(adjust_pvalues(p_test, 'bh'), stats.false_discovery_control(p_test))}")
@@ -1,8 +1,15 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.matrix_heatmap import matrix_heatmap  # noqa: E402
+from statistics_inferential.bin.covariance_matrix.comoment import CoMomentAccumulator  # noqa: E402
+
 # ---------- 1) Generate a synthetic customers.csv ----------
 np.random.seed(42)
 n = 500
@@ -35,8 +42,12 @@ df_selected = df[features].dropna()
 cov_matrix = df_selected.cov()
 print("\n📊 Covariance Matrix:\n", cov_matrix)
 
+# Same matrix from row chunks, as for a file too large to load at once
+acc = CoMomentAccumulator(features).update_many(np.array_split(df_selected.to_numpy(), 5))
+print("Streamed in 5 chunks matches df.cov():", np.allclose(acc.covariance(), cov_matrix.to_numpy()))
+
 plt.figure(figsize=(6,4))
-sns.heatmap(cov_matrix, annot=True, cmap='YlGnBu')
+matrix_heatmap(cov_matrix, cmap='YlGnBu')  # annotated in full for small p
 plt.title("Covariance Matrix")
 plt.tight_layout()
 plt.show()
@@ -11,11 +11,18 @@ This is the foundation of PCA, risk factor modeling, and portfolio diversificati
 You can use the top eigenvectors to construct uncorrelated portfolios or reduce dimensionality in asset selection.
 """
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.covariance_matrix.eigen_analysis import eigen_decomposition, explained_variance_frame  # noqa: E402
+
 # Load covariance matrix
 df_cov = pd.read_csv("/workspaces/stats-foundations-python/statistics_inferential/bin/covariance_matrix/covariance_matrix.csv", index_col=0)
 
@@ -25,12 +32,11 @@ cov_matrix = df_cov.values
 # -------------------------------
 # 1️⃣ Eigen Decomposition
 # -------------------------------
-eigenvalues, eigenvectors = np.linalg.eig(cov_matrix)
-
-# Sort by descending eigenvalue
-sorted_indices = np.argsort(eigenvalues)[::-1]
-eigenvalues = eigenvalues[sorted_indices]
-eigenvectors = eigenvectors[:, sorted_indices]
+# Symmetric solver: real eigenvalues, already in descending order, orthonormal eigenvectors
+# (pass k=10 for only the leading factors of a large matrix)
+eigen = eigen_decomposition(cov_matrix)
+eigenvalues, eigenvectors = eigen["eigenvalues"], eigen["eigenvectors"]
+print(explained_variance_frame(eigen).head(5).round(4))
 
 # -------------------------------
 # 2️⃣ Visualize Eigenvalues
@@ -0,0 +1,296 @@
+"""
+Batched Distribution Fitting and Goodness-of-Fit
+
+generate_dataset.py draws Poisson, uniform, normal and exponential columns; real files have
+hundreds of columns and we need to know which family fits each one. This module fits every
+candidate family to every column from streaming sufficient statistics, then scores and ranks:
+
+Family          Parameters (MLE)                         Sufficient statistics used
+normal          mu = mean, sigma = sqrt(M2/n)            n, mean, M2
+lognormal       m = mean(log x), s = sqrt(M2_log/n)      n, mean(log x), M2(log x)      (x > 0 only)
+exponential     rate = 1/mean                            n, mean                        (x >= 0 only)
+poisson         lam = mean                               n, mean, sum(lgamma(x+1))      (non-negative integers only)
+gamma           shape k: log k - digamma(k) = log(mean) - mean(log x)  (Newton, vectorized over columns)
+                scale = mean / k                         n, mean, mean(log x)           (x > 0 only)
+
+Scores
+- AIC = 2·(number of parameters) - 2·loglik, computed in closed form from the statistics above.
+  Candidates are ranked by AIC. For integer columns the Poisson pmf is compared with continuous
+  densities, so treat that comparison as a guide rather than a strict test.
+- KS statistic and p-value against a uniform random subsample of each column (bottom-k random
+  keys, mergeable across chunks). Parameters are estimated from the same data, so the p-value
+  is optimistic (Lilliefors effect); use D to compare fits. For discrete families (poisson)
+  D is taken over the distinct values, max(|ECDF(v) - F(v)|, |ECDF(v-) - F(v - 1)|), the exact
+  sup for integer data. Its continuous KS null distribution does not apply, so ks_pvalue is
+  NaN there; D remains comparable across families.
+
+Columns are split into groups and fitted in separate processes (fit_csv), each reading only
+its own columns chunk by chunk.
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+FAMILIES = ("normal", "lognormal", "exponential", "poisson", "gamma")
+N_PARAMS = {"normal": 2, "lognormal": 2, "exponential": 1, "poisson": 1, "gamma": 2}
+DISCRETE = ("poisson",)
+
+
+def _merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """Chan et al. pairwise merge of (count, mean, M2), element-wise over columns."""
+    n = n_a + n_b
+    safe_n = np.where(n > 0, n, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / safe_n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / safe_n
+    return n, mean, m2
+
+
+def _chunk_moments(x: np.ndarray):
+    """Per-column (count, mean, M2) of a 2-D block with NaNs treated as missing."""
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=0).astype(float)
+    safe_n = np.where(n > 0, n, 1)
+    mean = np.where(valid, x, 0.0).sum(axis=0) / safe_n
+    m2 = (np.where(valid, x - mean, 0.0) ** 2).sum(axis=0)
+    return n, mean, m2
+
+
+class ColumnStats:
+    """Streaming sufficient statistics for p columns plus a bounded KS subsample."""
+
+    def __init__(self, columns: Sequence[str], ks_sample: int = 5000, seed: Optional[int] = 42):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.ks_sample = ks_sample
+        self.rng = np.random.default_rng(seed)
+        self.n = np.zeros(p)
+        self.mean = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.n_log = np.zeros(p)
+        self.mean_log = np.zeros(p)
+        self.m2_log = np.zeros(p)
+        self.min = np.full(p, np.inf)
+        self.all_integer = np.ones(p, dtype=bool)
+        self.sum_lgamma1 = np.zeros(p)
+        self.sample = np.empty((0, p))
+        self.sample_keys = np.empty(0)
+
+    def update(self, block) -> "ColumnStats":
+        x = np.asarray(block, dtype=float)
+        if x.ndim == 1:
+            x = x[:, None]
+        if x.shape[0] == 0:
+            return self
+        valid = ~np.isnan(x)
+
+        self.n, self.mean, self.m2 = _merge_moments(self.n, self.mean, self.m2, *_chunk_moments(x))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logx = np.where(valid & (x > 0), np.log(np.where(x > 0, x, 1.0)), np.nan)
+        self.n_log, self.mean_log, self.m2_log = _merge_moments(
+            self.n_log, self.mean_log, self.m2_log, *_chunk_moments(logx))
+
+        self.min = np.minimum(self.min, np.where(valid, x, np.inf).min(axis=0))
+        self.all_integer &= np.all(~valid | (x == np.floor(x)), axis=0)
+        nonneg = np.where(valid & (x >= 0), x, 0.0)
+        self.sum_lgamma1 += special.gammaln(nonneg + 1.0).sum(axis=0)
+
+        keys = self.rng.random(x.shape[0])
+        self._keep_smallest(np.concatenate([self.sample_keys, keys]), np.vstack([self.sample, x]))
+        return self
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        self.n, self.mean, self.m2 = _merge_moments(self.n, self.mean, self.m2, other.n, other.mean, other.m2)
+        self.n_log, self.mean_log, self.m2_log = _merge_moments(
+            self.n_log, self.mean_log, self.m2_log, other.n_log, other.mean_log, other.m2_log)
+        self.min = np.minimum(self.min, other.min)
+        self.all_integer &= other.all_integer
+        self.sum_lgamma1 += other.sum_lgamma1
+        self._keep_smallest(np.concatenate([self.sample_keys, other.sample_keys]),
+                            np.vstack([self.sample, other.sample]))
+        return self
+
+    def _keep_smallest(self, keys: np.ndarray, rows: np.ndarray) -> None:
+        if keys.size > self.ks_sample:
+            keep = np.argpartition(keys, self.ks_sample - 1)[:self.ks_sample]
+            keys, rows = keys[keep], rows[keep]
+        self.sample_keys, self.sample = keys, rows
+
+
+def _gamma_shape(s: np.ndarray, iterations: int = 8) -> np.ndarray:
+    """Solve log k - digamma(k) = s for k, vectorized (Minka's start + Newton)."""
+    s = np.where(s > 0, s, np.nan)
+    k = (3.0 - s + np.sqrt((s - 3.0) ** 2 + 24.0 * s)) / (12.0 * s)
+    for _ in range(iterations):
+        k = k - (np.log(k) - special.digamma(k) - s) / (1.0 / k - special.polygamma(1, k))
+        k = np.where(k > 0, k, 1e-8)
+    return k
+
+
+def _fit_parameters(st: ColumnStats) -> Dict[str, dict]:
+    """Closed-form / Newton MLE and log-likelihood for every family, shape (p,) each."""
+    n = st.n
+    positive = (st.min > 0) & (st.n_log == n)
+    nonneg = st.min >= 0
+    sigma = np.sqrt(st.m2 / np.where(n > 0, n, 1))
+    s_log = np.sqrt(st.m2_log / np.where(n > 0, n, 1))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fits = {
+            "normal": {"params": {"loc": st.mean, "scale": sigma},
+                       "loglik": -0.5 * n * (np.log(2 * np.pi * sigma ** 2) + 1),
+                       "valid": sigma > 0},
+            "lognormal": {"params": {"s": s_log, "scale": np.exp(st.mean_log)},
+                          "loglik": -n * st.mean_log - 0.5 * n * (np.log(2 * np.pi * s_log ** 2) + 1),
+                          "valid": positive & (s_log > 0)},
+            "exponential": {"params": {"scale": st.mean},
+                            "loglik": -n * (np.log(st.mean) + 1),
+                            "valid": nonneg & (st.mean > 0)},
+            "poisson": {"params": {"mu": st.mean},
+                        "loglik": n * st.mean * np.log(st.mean) - n * st.mean - st.sum_lgamma1,
+                        "valid": nonneg & st.all_integer & (st.mean > 0)},
+        }
+        k = _gamma_shape(np.log(st.mean) - st.mean_log)
+        theta = st.mean / k
+        fits["gamma"] = {"params": {"a": k, "scale": theta},
+                         "loglik": (k - 1) * n * st.mean_log - n * k - n * k * np.log(theta) - n * special.gammaln(k),
+                         "valid": positive & np.isfinite(k)}
+    return fits
+
+
+def _cdf(family: str, y: np.ndarray, params: dict) -> np.ndarray:
+    if family == "normal":
+        return stats.norm.cdf(y, loc=params["loc"], scale=params["scale"])
+    if family == "lognormal":
+        return stats.lognorm.cdf(y, s=params["s"], scale=params["scale"])
+    if family == "exponential":
+        return stats.expon.cdf(y, scale=params["scale"])
+    if family == "poisson":
+        return stats.poisson.cdf(y, mu=params["mu"])
+    return stats.gamma.cdf(y, a=params["a"], scale=params["scale"])
+
+
+def _ks(family: str, sample: np.ndarray, params: dict):
+    """KS statistic and p-value for every column at once; sample is (m, p) with NaNs.
+
+    For DISCRETE families D is evaluated at the distinct values (ties share one ECDF step) and
+    the p-value, which assumes a continuous distribution, is NaN.
+    """
+    y = np.sort(sample, axis=0)  # NaNs sort to the end of each column
+    m = (~np.isnan(y)).sum(axis=0)
+    i = np.arange(1, y.shape[0] + 1)[:, None]
+    if not y.shape[0]:
+        return np.full(y.shape[1], np.nan), np.full(y.shape[1], np.nan)
+    with np.errstate(invalid="ignore"):
+        F = _cdf(family, y, params)
+        if family in DISCRETE:
+            # ECDF(v) at the last copy of each value, ECDF(v-) against F(v - 1) at the first
+            last = np.ones(y.shape, dtype=bool)
+            last[:-1] = y[:-1] != y[1:]
+            first = np.ones(y.shape, dtype=bool)
+            first[1:] = y[1:] != y[:-1]
+            d = np.maximum(np.where(last, np.abs(i / m - F), -np.inf),
+                           np.where(first, np.abs((i - 1) / m - _cdf(family, y - 1, params)), -np.inf))
+        else:
+            d = np.maximum(i / m - F, F - (i - 1) / m)
+    d = np.where(i <= m, d, -np.inf).max(axis=0)
+    if family in DISCRETE:
+        return d, np.full(d.shape, np.nan)
+    pvalue = np.where(m > 0, stats.kstwo.sf(d, np.maximum(m, 1)), np.nan)
+    return d, pvalue
+
+
+def score_fits(st: ColumnStats) -> pd.DataFrame:
+    """One row per (column, family) with parameters, loglik, AIC, KS and the AIC rank per column."""
+    fits = _fit_parameters(st)
+    rows: List[dict] = []
+    for family in FAMILIES:
+        fit = fits[family]
+        d, pvalue = _ks(family, st.sample, fit["params"])
+        aic = 2 * N_PARAMS[family] - 2 * fit["loglik"]
+        for j, column in enumerate(st.columns):
+            valid = bool(fit["valid"][j]) and np.isfinite(aic[j])
+            rows.append({
+                "column": column,
+                "family": family,
+                "params": {name: float(v[j]) for name, v in fit["params"].items()} if valid else None,
+                "loglik": float(fit["loglik"][j]) if valid else np.nan,
+                "aic": float(aic[j]) if valid else np.inf,
+                "ks_stat": float(d[j]) if valid else np.nan,
+                "ks_pvalue": float(pvalue[j]) if valid else np.nan,
+            })
+    result = pd.DataFrame(rows)
+    result["rank"] = result.groupby("column")["aic"].rank(method="first").astype(int)
+    result.loc[~np.isfinite(result["aic"]), "rank"] = 0
+    return result.sort_values(["column", "aic"], kind="stable").reset_index(drop=True)
+
+
+def best_fits(scores: pd.DataFrame) -> pd.DataFrame:
+    """Top-ranked family per column."""
+    return scores[scores["rank"] == 1].set_index("column")[["family", "params", "aic", "ks_stat", "ks_pvalue"]]
+
+
+def fit_frame(df: pd.DataFrame, columns: Optional[Sequence[str]] = None, ks_sample: int = 5000,
+              seed: Optional[int] = 42) -> pd.DataFrame:
+    """Fit in-process on an in-memory DataFrame."""
+    columns = list(columns) if columns is not None else list(df.select_dtypes("number").columns)
+    st = ColumnStats(columns, ks_sample, seed).update(df[columns].to_numpy(dtype=float))
+    return score_fits(st)
+
+
+def _fit_csv_group(path: str, columns: List[str], chunksize: int, ks_sample: int, seed: Optional[int]) -> pd.DataFrame:
+    st = ColumnStats(columns, ks_sample, seed)
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        st.update(chunk[columns].to_numpy(dtype=float))
+    return score_fits(st)
+
+
+def fit_csv(path: str, columns: Optional[Sequence[str]] = None, n_jobs: Optional[int] = None,
+            chunksize: int = 500_000, ks_sample: int = 5000, seed: Optional[int] = 42) -> pd.DataFrame:
+    """Stream a CSV and fit every numeric column, spreading column groups across processes."""
+    if columns is None:
+        head = pd.read_csv(path, nrows=1000)
+        columns = list(head.select_dtypes("number").columns)
+    columns = list(columns)
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(columns)))
+    groups = [list(g) for g in np.array_split(np.array(columns, dtype=object), n_jobs) if len(g)]
+    if n_jobs == 1:
+        return _fit_csv_group(path, columns, chunksize, ks_sample, seed)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        parts = pool.map(_fit_csv_group, [path] * len(groups), groups, [chunksize] * len(groups),
+                         [ks_sample] * len(groups), [seed] * len(groups))
+        return pd.concat(list(parts), ignore_index=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fit candidate distributions to many columns.")
+    ap.add_argument("--rows", type=int, default=200_000, help="rows per column")
+    ap.add_argument("--reps", type=int, default=50, help="copies of each generated family (columns = 5 * reps)")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    generators = {
+        "poisson": lambda: rng.poisson(3, args.rows),
+        "normal": lambda: rng.normal(50, 15, args.rows),
+        "exponential": lambda: rng.exponential(20, args.rows),
+        "lognormal": lambda: rng.lognormal(np.log(60000), 0.5, args.rows),
+        "gamma": lambda: rng.gamma(2.0, 50.0, args.rows),
+    }
+    df = pd.DataFrame({f"{family}_{r}": gen() for r in range(args.reps) for family, gen in generators.items()})
+
+    t0 = time.perf_counter()
+    scores = fit_frame(df)
+    elapsed = time.perf_counter() - t0
+    best = best_fits(scores)
+    truth = best.index.str.rsplit("_", n=1).str[0]
+    print(f"Fitted {len(FAMILIES)} families to {df.shape[1]} columns x {args.rows:,} rows in {elapsed:.2f}s")
+    print(f"Correct family ranked first: {(best['family'] == truth).mean():.1%}")
+    print(best.groupby(truth)["family"].value_counts().rename("columns"))
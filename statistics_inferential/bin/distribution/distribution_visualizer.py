@@ -6,11 +6,19 @@ PDF	            Continuous	        Density of values across a range (e.g., spend
 CDF	            Both	            Probability of values ≤ threshold (e.g., ≤ $50 spent)
 """
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import gaussian_kde
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.distribution.fft_kde import fft_kde  # noqa: E402
+from statistics_inferential.bin.distribution.ecdf_sketch import ecdf_from_array  # noqa: E402
+from statistics_inferential.bin.distribution.pmf_counter import FrequencyTable  # noqa: E402
 
 # Load dataset
 df = pd.read_csv("/workspaces/stats-foundations-python/statistics_inferential/bin/distribution/customer_behavior.csv")
@@ -19,11 +27,11 @@ df = pd.read_csv("/workspaces/stats-foundations-python/statistics_inferential/bi
 # 1️⃣ PMF: Discrete Variables
 # -------------------------------
 def plot_pmf(column):
-    counts = df[column].value_counts().sort_index()
-    probs = counts / counts.sum()
+    # Dense bincount table for integer codes, hash counts otherwise (see pmf_counter.py)
+    values, probs = FrequencyTable().update(df[column].to_numpy()).pmf()
 
     plt.figure(figsize=(6,4))
-    sns.barplot(x=probs.index, y=probs.values, hue=probs.index, palette='Blues', legend=False)
+    sns.barplot(x=values, y=probs, hue=values, palette='Blues', legend=False)
     plt.title(f"PMF of {column}")
     plt.xlabel(column)
     plt.ylabel("Probability")
@@ -39,10 +47,8 @@ plot_pmf("VisitFrequency")
 # -------------------------------
 def plot_pdf(column):
     data = df[column].dropna()
-    kde = gaussian_kde(data)
-
-    x_vals = np.linspace(data.min(), data.max(), 1000)
-    y_vals = kde(x_vals)
+    # Binned FFT KDE: near-linear in n; accuracy vs. gaussian_kde is documented in fft_kde.py
+    x_vals, y_vals = fft_kde(data.to_numpy(), grid=(data.min(), data.max()))
 
     plt.figure(figsize=(6,4))
     plt.plot(x_vals, y_vals, color='green')
@@ -62,11 +68,12 @@ plot_pdf("TimeInStore")
 # -------------------------------
 def plot_cdf(column):
     data = df[column].dropna()
-    sorted_data = np.sort(data)
-    cdf = np.arange(1, len(sorted_data)+1) / len(sorted_data)
+    # Fixed-resolution ECDF: at most 1000 vertices, vertical error < 1/1000 (see ecdf_sketch.py)
+    ecdf = ecdf_from_array(data.to_numpy(), k=1000)
 
     plt.figure(figsize=(6,4))
-    plt.plot(sorted_data, cdf, color='purple')
+    # Start the steps at (first value, 0) so the jump at the minimum is drawn
+    plt.step(np.r_[ecdf.values[0], ecdf.values], np.r_[0.0, ecdf.probs], where='post', color='purple')
     plt.title(f"CDF of {column}")
     plt.xlabel(column)
     plt.ylabel("Cumulative Probability")
@@ -0,0 +1,175 @@
+"""
+Bounded-Size ECDF
+
+plot_cdf() used to sort the whole column and draw one vertex per row. Here the ECDF is
+a fixed-resolution step function of k points with a known maximum vertical error:
+
+Builder             Input                   Max |F_hat(t) - F(t)|
+ecdf_from_array     in-memory array         < 1/k         (exact order statistics via np.partition)
+ECDFSketch          chunks / shards         < 1/k + rank_error/n   (rank_error is tracked exactly)
+
+ECDFSketch is a mergeable compactor sketch: level l holds sorted points that each stand for
+2**l rows. When a level grows past buffer_size it is compacted (keep every other point,
+alternating offset) into level l+1, which shifts any rank by less than 2**l. The sketch adds
+that weight to rank_error, so the bound reported by the final ECDF is a guarantee, not an
+estimate. Worst case it stays below (log2(n / buffer_size) + 1) / buffer_size.
+
+Query cost on the result is one searchsorted over k points, i.e. O(log k).
+"""
+
+import time
+import argparse
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+class StepECDF:
+    """Right-continuous step function P(X <= t) stored as k (value, probability) vertices."""
+
+    def __init__(self, values: np.ndarray, probs: np.ndarray, n: int, max_error: float):
+        self.values = np.asarray(values, dtype=float)
+        self.probs = np.asarray(probs, dtype=float)
+        self.n = int(n)
+        self.max_error = float(max_error)
+        self._padded = np.concatenate([[0.0], self.probs])
+
+    def __len__(self) -> int:
+        return self.values.size
+
+    def __call__(self, t):
+        """P(X <= t) for a scalar or array of thresholds."""
+        idx = np.searchsorted(self.values, t, side="right")
+        return self._padded[idx]
+
+    def quantile(self, q):
+        """Smallest stored value whose cumulative probability reaches q."""
+        idx = np.searchsorted(self.probs, q, side="left")
+        return self.values[np.clip(idx, 0, self.values.size - 1)]
+
+
+def _clean(chunk) -> np.ndarray:
+    x = np.asarray(chunk, dtype=float).ravel()
+    return x[~np.isnan(x)]
+
+
+def ecdf_from_array(data, k: int = 1000) -> StepECDF:
+    """Exact order statistics at k evenly spaced ranks; vertical error < 1/k."""
+    x = _clean(data)
+    n = x.size
+    if n == 0:
+        raise ValueError("No non-missing values to build an ECDF from.")
+    k = min(k, n)
+    ranks = np.unique(np.ceil(np.arange(1, k + 1) * n / k).astype(np.int64))
+    values = np.partition(x, ranks - 1)[ranks - 1]
+    return StepECDF(values, ranks / n, n, 1.0 / k if k < n else 0.0)
+
+
+class ECDFSketch:
+    """Mergeable quantile sketch for chunked input; call to_ecdf(k) at the end."""
+
+    def __init__(self, buffer_size: int = 4096):
+        if buffer_size < 2:
+            raise ValueError("buffer_size must be at least 2.")
+        self.buffer_size = buffer_size
+        self.n = 0
+        self.rank_error = 0
+        self._levels: Dict[int, np.ndarray] = {}
+        self._offsets: Dict[int, int] = {}
+
+    def update(self, chunk) -> "ECDFSketch":
+        x = _clean(chunk)
+        if x.size:
+            self.n += x.size
+            self._add(0, x)
+            self._compact()
+        return self
+
+    def update_many(self, chunks: Iterable) -> "ECDFSketch":
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other: "ECDFSketch") -> "ECDFSketch":
+        self.n += other.n
+        self.rank_error += other.rank_error
+        for level, points in other._levels.items():
+            self._add(level, points)
+        self._compact()
+        return self
+
+    def _add(self, level: int, points: np.ndarray) -> None:
+        held = self._levels.get(level)
+        self._levels[level] = points.copy() if held is None else np.concatenate([held, points])
+
+    def _compact(self) -> None:
+        level = 0
+        while level <= max(self._levels, default=-1):
+            points = self._levels.get(level)
+            if points is not None and points.size > self.buffer_size:
+                points = np.sort(points)
+                # Hold back the largest point when the count is odd so pairs stay aligned
+                keep = points[-1:] if points.size % 2 else points[:0]
+                paired = points[:points.size - keep.size]
+                offset = self._offsets.get(level, 0)
+                self._offsets[level] = 1 - offset
+                self._levels[level] = keep
+                self._add(level + 1, paired[offset::2])
+                self.rank_error += 2 ** level
+            level += 1
+
+    def to_ecdf(self, k: int = 1000) -> StepECDF:
+        """Reduce the sketch to k vertices; adds < 1/k to the tracked error."""
+        if self.n == 0:
+            raise ValueError("Sketch is empty.")
+        values = np.concatenate([pts for pts in self._levels.values()])
+        weights = np.concatenate([np.full(pts.size, 2.0 ** lvl) for lvl, pts in self._levels.items()])
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cum = np.cumsum(weights[order])
+
+        reduction_error = 1.0 / k if k < values.size else 0.0
+        k = min(k, values.size)
+        idx = np.unique(np.searchsorted(cum, np.arange(1, k + 1) * cum[-1] / k, side="left"))
+        idx = np.minimum(idx, values.size - 1)
+        return StepECDF(values[idx], cum[idx] / cum[-1], self.n, self.rank_error / self.n + reduction_error)
+
+
+def ecdf_from_chunks(chunks: Iterable, k: int = 1000, buffer_size: int = 4096,
+                     sketch: Optional[ECDFSketch] = None) -> StepECDF:
+    """One pass over an iterator of 1-D chunks (e.g. pd.read_csv(..., chunksize=...))."""
+    sketch = sketch if sketch is not None else ECDFSketch(buffer_size)
+    return sketch.update_many(chunks).to_ecdf(k)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Check bounded-size ECDF error and speed.")
+    ap.add_argument("--n", type=int, default=5_000_000, help="number of rows")
+    ap.add_argument("--k", type=int, default=1000, help="ECDF resolution")
+    ap.add_argument("--chunk", type=int, default=250_000, help="chunk size for the sketch")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = rng.exponential(20, args.n)
+    exact = np.sort(data)
+    probe = np.quantile(data, np.linspace(0, 1, 20_001))
+
+    def observed_error(ecdf: StepECDF) -> float:
+        truth = np.searchsorted(exact, probe, side="right") / exact.size
+        return float(np.abs(ecdf(probe) - truth).max())
+
+    t0 = time.perf_counter()
+    e_arr = ecdf_from_array(data, args.k)
+    t_arr = time.perf_counter() - t0
+    print(f"ecdf_from_array : {t_arr:.2f}s  vertices={len(e_arr)}  "
+          f"bound={e_arr.max_error:.4f}  observed={observed_error(e_arr):.4f}")
+
+    shards = [ECDFSketch(), ECDFSketch()]
+    t0 = time.perf_counter()
+    for i, start in enumerate(range(0, args.n, args.chunk)):
+        shards[i % 2].update(data[start:start + args.chunk])
+    e_sk = shards[0].merge(shards[1]).to_ecdf(args.k)
+    t_sk = time.perf_counter() - t0
+    print(f"ECDFSketch (2 merged shards): {t_sk:.2f}s  vertices={len(e_sk)}  "
+          f"bound={e_sk.max_error:.4f}  observed={observed_error(e_sk):.4f}")
@@ -15,11 +15,18 @@ Overlays a red Probability Density Function (PDF) curve
 Calculates the probability that temperature is between 32°C and 33°C
 Includes a legend for clarity
 """
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import norm
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.normal_distribution.interval_probability import interval_probability  # noqa: E402
+
 # -------------------------------
 # 1️⃣ Generate Synthetic Temperature Data
 # -------------------------------
@@ -34,7 +41,8 @@ temperatures = np.random.normal(loc=mean_temp, scale=std_temp, size=n_days)
 # -------------------------------
 # 2️⃣ Calculate Probability: 32°C to 33°C
 # -------------------------------
-prob_32_33 = norm.cdf(33, loc=mean_temp, scale=std_temp) - norm.cdf(32, loc=mean_temp, scale=std_temp)
+# Batched/stable API; also accepts arrays of bounds and parameters (see interval_probability.py)
+prob_32_33 = interval_probability(32, 33, mu=mean_temp, sigma=std_temp)
 print(f"📊 Probability that temperature is between 32°C and 33°C: {prob_32_33:.2%}")
 
 # -------------------------------
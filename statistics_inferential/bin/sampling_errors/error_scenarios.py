@@ -0,0 +1,184 @@
+"""
+Sampling-Error Scenario Runner
+
+sampling_errors_demo.py and sampling_errors_demo_02.py show each error once on 1000
+customers. This runner repeats every scenario many times on populations of millions and
+reports the distribution of the bias it causes in an estimated mean.
+
+A scenario combines up to three vectorized rules, each a function of the population
+DataFrame evaluated once over all rows:
+
+Rule        Returns (one value per row)                 Models
+frame       bool: row can be sampled at all             sample frame error (e.g. online-only lists)
+selection   relative selection weight (>= 0)            selection error (over-sampling some rows)
+response    probability of responding (0-1)             non-response error (who answers)
+
+Each repetition draws n rows from the frame - a simple random sample, or with probability
+proportional to the selection weight (with replacement, O(n log N) via searchsorted on the
+cumulative weights) - keeps the respondents, and takes the naive mean of the target
+column, as an analyst unaware of the errors would. A "baseline" scenario (no rules) is
+always included, so its spread is pure sampling error.
+
+The per-scenario arrays are computed once in the parent and placed in shared memory
+(design_comparison.SharedPopulation); worker processes attach to them and run blocks of
+repetitions. Repetition r of a scenario uses the named stream ("error_scenarios", name, r),
+so results do not depend on n_jobs, and adding a scenario leaves the others unchanged.
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.rng_registry import RNGRegistry, registry  # noqa: E402
+from statistics_inferential.bin.sampling_techniques.design_comparison import SharedPopulation  # noqa: E402
+
+Rule = Callable[[pd.DataFrame], np.ndarray]
+
+_ARRAYS: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(spec: dict) -> None:
+    _ARRAYS.update(SharedPopulation.attach(spec))
+
+
+def _scenario_arrays(population: pd.DataFrame, target: str, scenario: Dict[str, Rule]) -> Dict[str, np.ndarray]:
+    """Frame rows' target values, cumulative selection weights and response probabilities."""
+    unknown = set(scenario) - {"frame", "selection", "response"}
+    if unknown:
+        raise ValueError(f"Unknown scenario rules: {sorted(unknown)}")
+    values = population[target].to_numpy(dtype=float)
+    frame = ~np.isnan(values)
+    if scenario.get("frame") is not None:
+        frame &= np.asarray(scenario["frame"](population), dtype=bool)
+    rows = np.flatnonzero(frame)
+    if rows.size == 0:
+        raise ValueError("The sampling frame is empty.")
+    arrays = {"values": values[rows]}
+    if scenario.get("selection") is not None:
+        weights = np.broadcast_to(np.asarray(scenario["selection"](population), dtype=float), values.shape)[rows]
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("Selection weights must be non-negative with a positive total.")
+        arrays["cum_weights"] = np.cumsum(weights)
+    if scenario.get("response") is not None:
+        prob = np.broadcast_to(np.asarray(scenario["response"](population), dtype=float), values.shape)[rows]
+        arrays["response"] = np.clip(prob, 0.0, 1.0).astype(np.float32)
+    return arrays
+
+
+def _run_block(name: str, n: int, seeds: Sequence[np.random.SeedSequence]) -> np.ndarray:
+    """Rows of (estimate, respondents) for each repetition of one scenario."""
+    values = _ARRAYS[f"{name}/values"]
+    cum_weights = _ARRAYS.get(f"{name}/cum_weights")
+    response = _ARRAYS.get(f"{name}/response")
+    out = np.empty((len(seeds), 2))
+    for r, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        if cum_weights is None:
+            idx = rng.choice(values.size, min(n, values.size), replace=False)
+        else:
+            idx = np.searchsorted(cum_weights, rng.random(n) * cum_weights[-1], side="right")
+        if response is not None:
+            idx = idx[rng.random(idx.size, dtype=np.float32) < response[idx]]
+        out[r] = (values[idx].mean() if idx.size else np.nan), idx.size
+    return out
+
+
+def run_scenarios(population: pd.DataFrame, target: str, scenarios: Dict[str, Dict[str, Rule]], n: int,
+                  repetitions: int = 2000, seed: Union[None, int, RNGRegistry] = None,
+                  n_jobs: Optional[int] = None) -> tuple:
+    """
+    Repeat every scenario and summarize the bias of the naive mean of `target`.
+
+    Returns (summary, draws): summary has one row per scenario; draws holds the bias of every
+    repetition (one column per scenario).
+    """
+    truth = float(population[target].mean())
+    scenarios = {"baseline": {}, **scenarios}
+    arrays, frame_share = {}, {}
+    for name, scenario in scenarios.items():
+        if "/" in name:
+            raise ValueError(f"Scenario names cannot contain '/': {name!r}")
+        part = _scenario_arrays(population, target, scenario)
+        frame_share[name] = part["values"].size / len(population)
+        arrays.update({f"{name}/{key}": value for key, value in part.items()})
+
+    n_jobs = max(1, n_jobs or os.cpu_count() or 1)
+    streams = registry(seed)
+    raw = {}
+    with SharedPopulation(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(shared.spec(),)) as pool:
+            futures = {}
+            for name in scenarios:
+                rep_seeds = streams.seed_sequences("error_scenarios", name, count=repetitions)
+                chunks = [c for c in np.array_split(np.arange(repetitions), n_jobs) if c.size]
+                futures[name] = [pool.submit(_run_block, name, n, [rep_seeds[i] for i in c]) for c in chunks]
+            for name, fs in futures.items():
+                raw[name] = np.concatenate([f.result() for f in fs])
+
+    rows, draws = [], {}
+    for name, res in raw.items():
+        bias = res[:, 0] - truth
+        draws[name] = bias
+        q05, q50, q95 = np.nanquantile(bias, [0.05, 0.5, 0.95])
+        rows.append({"scenario": name, "frame_coverage": frame_share[name], "mean_respondents": res[:, 1].mean(),
+                     "mean_bias": np.nanmean(bias), "relative_bias": np.nanmean(bias) / truth,
+                     "sd": np.nanstd(bias, ddof=1), "rmse": np.sqrt(np.nanmean(bias ** 2)),
+                     "q05": q05, "median": q50, "q95": q95})
+    return pd.DataFrame(rows).set_index("scenario"), pd.DataFrame(draws)
+
+
+def generate_customers(size: int, seed: Union[None, int, RNGRegistry] = None) -> pd.DataFrame:
+    """Vectorized version of generate_customers_dataset.py, with realistic dependencies between columns."""
+    rng = registry(seed).stream("generate_customers")
+    age = np.clip(rng.normal(40, 12, size), 18, 80).astype(np.int16)
+    region = rng.integers(0, 4, size).astype(np.int8)
+    income = np.clip(35_000 + 600.0 * age + 5_000 * (region == 0) + rng.normal(0, 15_000, size), 20_000, 150_000)
+    subscribed = (rng.random(size) < 0.45 + 0.3 * (income - 20_000) / 130_000).astype(np.int8)
+    has_website = rng.random(size) < np.clip(1.1 - 0.01 * age, 0.2, 0.95)
+    return pd.DataFrame({"Age": age, "Region": pd.Categorical.from_codes(region, ["North", "South", "East", "West"]),
+                         "Income": income, "Subscribed": subscribed, "HasWebsite": has_website})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Simulate selection, non-response and frame errors at scale.")
+    ap.add_argument("--csv", default=None, help="customers CSV (default: generated population)")
+    ap.add_argument("--population", type=int, default=10_000_000, help="generated population size")
+    ap.add_argument("--target", default="Income", help="column whose mean is estimated")
+    ap.add_argument("--n", type=int, default=1000, help="sample size per repetition")
+    ap.add_argument("--repetitions", type=int, default=5000, help="repetitions per scenario")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.csv:
+        pop = pd.read_csv(args.csv)
+        pop["Subscribed"] = (pop["Subscribed"] == "Yes").astype(np.int8)
+        pop["HasWebsite"] = pop["Website"].notna()
+    else:
+        pop = generate_customers(args.population, seed=args.seed)
+    print(f"Population: {len(pop):,} customers ({time.perf_counter() - t0:.1f}s), "
+          f"mean {args.target} = {pop[args.target].mean():,.2f}")
+
+    scenarios = {
+        "frame: online only": {"frame": lambda df: df["HasWebsite"].to_numpy()},
+        "selection: North x3": {"selection": lambda df: np.where(df["Region"] == "North", 3.0, 1.0)},
+        "non-response: subscribers answer": {"response": lambda df: 0.3 + 0.5 * df["Subscribed"].to_numpy()},
+        "all three": {"frame": lambda df: df["HasWebsite"].to_numpy(),
+                      "selection": lambda df: np.where(df["Region"] == "North", 3.0, 1.0),
+                      "response": lambda df: 0.3 + 0.5 * df["Subscribed"].to_numpy()},
+    }
+    t0 = time.perf_counter()
+    summary, draws = run_scenarios(pop, args.target, scenarios, args.n, args.repetitions,
+                                   seed=args.seed, n_jobs=args.jobs)
+    print(f"{len(summary)} scenarios x {args.repetitions:,} repetitions in {time.perf_counter() - t0:.1f}s")
+    print(summary.round(4).to_string())
@@ -32,7 +32,7 @@ print("Region distribution:\n", selected['Region'].value_counts())
 # 3️⃣ Non-Response Error
 # -------------------------------
 # Simulate missing responses in 'Subscribed' column
-df['Subscribed'] = df['Subscribed'].replace(np.random.choice(df['Subscribed'], size=100), np.nan)
+df.loc[df.sample(n=100, random_state=42).index, 'Subscribed'] = np.nan
 non_response_rate = df['Subscribed'].isna().mean()
 
 print(f"\nNon-Response Error: {non_response_rate:.2%} of responses missing in 'Subscribed'")
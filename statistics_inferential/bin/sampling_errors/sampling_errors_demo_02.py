@@ -1,10 +1,19 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sample_cache import SampleCache, cached_sample, dataset_version  # noqa: E402
+
 # Load realistic customer dataset
 df = pd.read_csv("/workspaces/stats-foundations-python/statistics_inferential/bin/sampling_errors/input/customers.csv")
+sample_cache = SampleCache("/workspaces/stats-foundations-python/statistics_inferential/bin/sampling_errors/output/sample_cache")
+customers_version = dataset_version(df)
 
 # -------------------------------
 # 1️⃣ Population-Specific Error
@@ -34,7 +43,7 @@ print("Region distribution:\n", selected['Region'].value_counts())
 # 3️⃣ Non-Response Error
 # -------------------------------
 # Randomly remove responses from 'Subscribed'
-non_response_indices = df.sample(n=100, random_state=42).index
+non_response_indices = cached_sample(df, n=100, random_state=42, cache=sample_cache, version=customers_version).index
 df.loc[non_response_indices, 'Subscribed'] = np.nan
 non_response_rate = df['Subscribed'].isna().mean()
 
@@ -44,7 +53,7 @@ print(f"\nNon-Response Error: {non_response_rate:.2%} of responses missing in 'S
 # 4️⃣ Sample Error
 # -------------------------------
 # Draw a small random sample and compare income mean
-sample = df.sample(n=50, random_state=42)
+sample = cached_sample(df, n=50, random_state=42, cache=sample_cache, version=customers_version)
 population_mean = df['Income'].mean()
 sample_mean = sample['Income'].mean()
 
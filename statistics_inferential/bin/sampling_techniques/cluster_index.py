@@ -0,0 +1,199 @@
+"""
+Cluster Index for Multi-Stage Sampling
+
+cluster_sampling.py and cluster_sampling_02.py pick clusters with np.random.choice and then run
+df[df[col].isin(selected)], which scans every row of the population for every sample.
+ClusterIndex maps each cluster to its rows once, so drawing a sample only touches the rows of
+the selected clusters:
+
+Layout      Built when                                  Rows of cluster c
+ranges      labels are already grouped (sorted files)   start[c] : start[c] + count[c]
+order       otherwise (one stable argsort, O(N log N))  order[start[c] : start[c] + count[c]]
+
+The index is a handful of int64 arrays and can be saved with np.savez and reloaded, so the
+sort is paid once per dataset rather than once per sample.
+
+two_stage_sample() draws clusters by simple random sampling and then units within each
+selected cluster (all of them for one-stage cluster sampling). cluster_mean() returns the
+ratio estimate of the mean, its ultimate-cluster standard error, and the design effect
+(variance relative to a simple random sample of the same number of units).
+"""
+
+import time
+import argparse
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+
+class ClusterIndex:
+    """Cluster id -> row positions, as contiguous ranges or ranges into a stable sort order."""
+
+    def __init__(self, ids: np.ndarray, starts: np.ndarray, counts: np.ndarray,
+                 order: Optional[np.ndarray] = None):
+        self.ids = np.asarray(ids)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.order = None if order is None else np.asarray(order, dtype=np.int64)
+
+    @classmethod
+    def from_labels(cls, labels) -> "ClusterIndex":
+        """Index a column of cluster labels (any sortable dtype)."""
+        labels = np.asarray(labels)
+        if labels.size == 0:
+            return cls(labels[:0], np.empty(0), np.empty(0))
+        run_starts = np.flatnonzero(np.concatenate([[True], labels[1:] != labels[:-1]]))
+        ids = labels[run_starts]
+        if np.unique(ids).size == ids.size:
+            # Each cluster occupies one contiguous block: no sort order needed
+            counts = np.diff(np.append(run_starts, labels.size))
+            return cls(ids, run_starts, counts)
+        order = np.argsort(labels, kind="stable")
+        sorted_labels = labels[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_labels[1:] != sorted_labels[:-1]]))
+        counts = np.diff(np.append(starts, labels.size))
+        return cls(sorted_labels[starts], starts, counts, order)
+
+    def __len__(self) -> int:
+        return self.ids.size
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.counts.sum())
+
+    def positions(self, cluster_ids) -> np.ndarray:
+        """Positions in the index of the given cluster ids (KeyError for unknown ids)."""
+        cluster_ids = np.asarray(cluster_ids)
+        if self.order is not None:
+            pos = np.searchsorted(self.ids, cluster_ids)
+        else:
+            lookup = np.argsort(self.ids, kind="stable")
+            pos = lookup[np.minimum(np.searchsorted(self.ids[lookup], cluster_ids), self.ids.size - 1)]
+        pos = np.minimum(pos, self.ids.size - 1)
+        if np.any(self.ids[pos] != cluster_ids):
+            raise KeyError(f"Unknown cluster ids: {cluster_ids[self.ids[pos] != cluster_ids]}")
+        return pos
+
+    def rows(self, positions) -> np.ndarray:
+        """Row positions of the clusters at the given index positions, cluster by cluster."""
+        positions = np.asarray(positions, dtype=np.int64)
+        counts = self.counts[positions]
+        first = np.cumsum(counts) - counts
+        slots = np.arange(counts.sum()) + np.repeat(self.starts[positions] - first, counts)
+        return slots if self.order is None else self.order[slots]
+
+    def save(self, path: str) -> None:
+        order = np.empty(0, dtype=np.int64) if self.order is None else self.order
+        np.savez(path, ids=self.ids, starts=self.starts, counts=self.counts, order=order,
+                 sorted=np.array(self.order is not None))
+
+    @classmethod
+    def load(cls, path: str) -> "ClusterIndex":
+        with np.load(path, allow_pickle=False) as f:
+            order = f["order"] if bool(f["sorted"]) else None
+            return cls(f["ids"], f["starts"], f["counts"], order)
+
+
+def two_stage_sample(index: ClusterIndex, n_clusters: int, m: Union[None, int, float] = None,
+                     rng: Union[None, int, np.random.Generator] = None
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Draw n_clusters clusters, then m units without replacement within each.
+
+    m=None keeps every unit (one-stage cluster sampling), an int takes min(m, M_i) units and a
+    float in (0, 1] takes round(m * M_i) units (at least one). Returns (rows, cluster_of_row,
+    selected_positions), where cluster_of_row gives each row's position in the index.
+    """
+    rng = np.random.default_rng(rng)
+    if not 0 < n_clusters <= len(index):
+        raise ValueError(f"n_clusters must be between 1 and {len(index)}.")
+    selected = np.sort(rng.choice(len(index), n_clusters, replace=False))
+    rows = index.rows(selected)
+    sizes = index.counts[selected]
+    cluster_of_row = np.repeat(selected, sizes)
+    if m is None:
+        return rows, cluster_of_row, selected
+
+    if isinstance(m, float):
+        if not 0 < m <= 1:
+            raise ValueError("A fractional m must be in (0, 1].")
+        take = np.maximum(1, np.rint(m * sizes)).astype(np.int64)
+    else:
+        take = np.minimum(int(m), sizes)
+    # Shuffle within each selected cluster and keep the first take[i] rows
+    local = np.repeat(np.arange(n_clusters), sizes)
+    order = np.lexsort((rng.random(rows.size), local))
+    rank = np.arange(rows.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    keep = order[rank < take[local]]
+    keep.sort()
+    return rows[keep], cluster_of_row[keep], selected
+
+
+def cluster_mean(values, cluster_of_row: np.ndarray, index: ClusterIndex,
+                 selected: np.ndarray) -> dict:
+    """
+    Ratio estimate of the population mean from a (two-stage) cluster sample.
+
+    values holds the sampled units' values. The standard error uses the ultimate-cluster
+    (between-cluster) variance with a first-stage finite population correction; deff compares
+    it with an SRS of the same number of units, and icc is the implied intra-cluster
+    correlation from deff = 1 + (m_bar - 1) * icc.
+    """
+    values = np.asarray(values, dtype=float)
+    local = np.searchsorted(selected, cluster_of_row)
+    n = selected.size
+    m_i = np.bincount(local, minlength=n).astype(float)
+    mean_i = np.bincount(local, weights=values, minlength=n) / np.maximum(m_i, 1)
+    big_m = index.counts[selected].astype(float)
+    estimate = float(np.sum(big_m * mean_i) / big_m.sum())
+
+    f1 = n / len(index)
+    resid = big_m * (mean_i - estimate)
+    var = (1 - f1) * np.sum(resid ** 2) / (n * max(n - 1, 1) * big_m.mean() ** 2) if n > 1 else float("nan")
+    n_units = values.size
+    var_srs = (1 - n_units / index.n_rows) * values.var(ddof=1) / n_units
+    deff = var / var_srs if var_srs > 0 else float("nan")
+    m_bar = m_i.mean()
+    return {"mean": estimate, "se": float(np.sqrt(var)), "deff": float(deff),
+            "icc": float((deff - 1) / (m_bar - 1)) if m_bar > 1 else float("nan"),
+            "n_clusters": n, "n_units": n_units}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark cluster sampling through a ClusterIndex.")
+    ap.add_argument("--rows", type=int, default=20_000_000, help="population rows")
+    ap.add_argument("--clusters", type=int, default=50_000, help="number of clusters")
+    ap.add_argument("--sample-clusters", type=int, default=200, help="clusters per sample")
+    ap.add_argument("--m", type=int, default=20, help="units per selected cluster (second stage)")
+    ap.add_argument("--repeats", type=int, default=20, help="samples to draw")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    labels = rng.integers(0, args.clusters, args.rows)  # shuffled, as in an unsorted export
+    values = rng.normal(50_000, 10_000, args.rows) + 3_000 * rng.standard_normal(args.clusters)[labels]
+
+    t0 = time.perf_counter()
+    index = ClusterIndex.from_labels(labels)
+    print(f"Index over {args.rows:,} rows / {len(index):,} clusters built in {time.perf_counter() - t0:.2f}s "
+          f"({'ranges' if index.order is None else 'sorted order'})")
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        chosen = rng.choice(index.ids, args.sample_clusters, replace=False)
+        rows_isin = np.flatnonzero(np.isin(labels, chosen))
+    t_isin = (time.perf_counter() - t0) / args.repeats
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        rows, cluster_of_row, selected = two_stage_sample(index, args.sample_clusters, rng=rng)
+    t_index = (time.perf_counter() - t0) / args.repeats
+    print(f"One-stage sample of {args.sample_clusters} clusters: isin scan {t_isin * 1e3:.1f} ms, "
+          f"index {t_index * 1e3:.2f} ms ({t_isin / t_index:,.0f}x)")
+
+    for label, m in (("one-stage", None), (f"two-stage (m={args.m})", args.m)):
+        rows, cluster_of_row, selected = two_stage_sample(index, args.sample_clusters, m, rng=rng)
+        res = cluster_mean(values[rows], cluster_of_row, index, selected)
+        print(f"{label:>18}: {res['n_units']:,} units, mean={res['mean']:,.0f} ± {1.96 * res['se']:,.0f}, "
+              f"deff={res['deff']:.1f}, icc={res['icc']:.3f}")
+    print(f"Population mean = {values.mean():,.0f}")
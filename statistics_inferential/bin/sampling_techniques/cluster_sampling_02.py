@@ -5,11 +5,19 @@ This divides the population into clusters, randomly selects clusters, and sample
 Real-World Scenario: A market research firm surveys households clustered by city neighborhoods (10 clusters of 100 households each) to infer average income for urban planning.
 """
 
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sampling_techniques.cluster_index import ClusterIndex, two_stage_sample, cluster_mean  # noqa: E402
+from statistics_inferential.bin.sampling_techniques.bootstrap import bootstrap  # noqa: E402
+
 # Generate synthetic population: 10 clusters (neighborhoods) x 100 households, with incomes
 np.random.seed(42)
 num_clusters = 10
@@ -23,14 +31,20 @@ pop_mean_income = population['Income'].mean()
 print(f"Population Mean Income: ${pop_mean_income:.2f}")
 
 # Cluster Sampling: Randomly select 3 clusters, take all households in them
-selected_clusters = np.random.choice(range(1, num_clusters + 1), size=3, replace=False)
-sample = population[population['Neighborhood'].isin(selected_clusters)]
+cluster_index = ClusterIndex.from_labels(population['Neighborhood'].to_numpy())
+rows, cluster_of_row, selected = two_stage_sample(cluster_index, n_clusters=3, rng=42)
+selected_clusters = cluster_index.ids[selected]
+sample = population.iloc[rows]
 
 # Sample stats
 sample_mean_income = sample['Income'].mean()
 confidence_interval = stats.t.interval(0.95, df=len(sample)-1, loc=sample_mean_income, scale=stats.sem(sample['Income']))
 print(f"Sample Mean Income: ${sample_mean_income:.2f}")
 print(f"95% Confidence Interval: (${confidence_interval[0]:.2f}, ${confidence_interval[1]:.2f})")
+design = cluster_mean(sample['Income'].to_numpy(), cluster_of_row, cluster_index, selected)
+print(f"Design effect: {design['deff']:.1f} (cluster-based 95% CI: ${design['mean'] - 1.96 * design['se']:.2f} to ${design['mean'] + 1.96 * design['se']:.2f})")
+boot = bootstrap(sample['Income'].to_numpy(), 'mean', n_resamples=5000, interval='percentile', clusters=cluster_of_row, seed=42)
+print(f"95% Cluster Bootstrap Interval: (${boot['ci_low']:.2f}, ${boot['ci_high']:.2f})")
 print("Interpretation: Cost-effective for spread-out areas; interval helps stakeholders plan budgets accurately.")
 
 # Visualize
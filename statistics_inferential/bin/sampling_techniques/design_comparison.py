@@ -0,0 +1,227 @@
+"""
+Sampling-Design Comparison Harness
+
+The four *_02.py scripts each show one design once. This harness runs thousands of
+repetitions of every design on the same population and tabulates how they actually behave:
+
+Column          Meaning
+bias            mean(estimate) - population mean
+emp_se          standard deviation of the estimates across repetitions
+rmse            sqrt(bias² + emp_se²)
+mean_est_se     average standard error the design's own formula reported
+coverage        share of nominal 95% intervals (estimate ± 1.96 SE) containing the truth
+cost            unit_cost * units + cluster_cost * distinct clusters visited, per sample
+cost_per_unit   cost / units
+efficiency      (rmse² * cost) of SRS divided by that of the design (> 1: better value than SRS)
+
+Designs (same expected number of units n)
+srs         simple random sample, sample mean, SRS standard error with FPC
+stratified  proportional allocation via stratified_sampler, stratified mean and SE
+systematic  rows floor(start + i N / n), i = 0..n-1, start uniform in [0, N / n) (a
+            fractional interval, so exactly n rows even when n does not divide N); SE uses
+            the SRS formula, as is customary, so its coverage shows how that assumption
+            holds on the file order
+cluster     whole clusters via a ClusterIndex, ratio mean and ultimate-cluster SE
+
+The population's columns (values, stratum codes, cluster codes and the cluster index) are
+placed in multiprocessing shared memory once; worker processes attach to them instead of
+receiving pickled copies, so a 10M-row population costs one copy regardless of n_jobs.
+Repetition r of a design uses the named stream ("design_comparison", design, r), so results
+do not depend on n_jobs, and adding or dropping a design leaves the others unchanged.
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sampling_techniques.cluster_index import ClusterIndex, two_stage_sample, cluster_mean  # noqa: E402
+from statistics_inferential.bin.sampling_techniques.stratified_sampler import stratified_sample, stratified_mean  # noqa: E402
+from statistics_inferential.bin.rng_registry import RNGRegistry, registry  # noqa: E402
+
+DESIGNS = ("srs", "stratified", "systematic", "cluster")
+
+_ATTACHED: Dict[str, np.ndarray] = {}
+_SEGMENTS = []
+
+
+class SharedPopulation:
+    """Context manager placing named arrays in shared memory; spec() describes how to attach."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._segments = []
+        self._spec = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+            self._segments.append(shm)
+            self._spec[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def spec(self) -> dict:
+        return dict(self._spec)
+
+    @staticmethod
+    def attach(spec: dict) -> Dict[str, np.ndarray]:
+        """Map the arrays described by spec() into this process (kept open for its lifetime)."""
+        arrays = {}
+        for name, (shm_name, shape, dtype) in spec.items():
+            # Pool workers share the parent's resource tracker, which unlinks the segment once
+            shm = shared_memory.SharedMemory(name=shm_name)
+            _SEGMENTS.append(shm)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        return arrays
+
+    def __enter__(self) -> "SharedPopulation":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+
+
+def _attach(spec: dict) -> None:
+    """Pool initializer: map the shared arrays into this worker."""
+    _ATTACHED.update(SharedPopulation.attach(spec))
+
+
+def _srs_result(values: np.ndarray, idx: np.ndarray) -> tuple:
+    x = values[idx]
+    se = np.sqrt((1 - idx.size / values.size) * x.var(ddof=1) / idx.size)
+    return float(x.mean()), float(se)
+
+
+def _run_design(design: str, n: int, seeds: Sequence[np.random.SeedSequence]) -> np.ndarray:
+    """Rows of (estimate, se, units, clusters visited) for each repetition."""
+    values = _ATTACHED["values"]
+    clusters = _ATTACHED["clusters"]
+    size = values.size
+    index = None
+    if design == "cluster":
+        order = _ATTACHED["index_order"]
+        index = ClusterIndex(_ATTACHED["index_ids"], _ATTACHED["index_starts"], _ATTACHED["index_counts"],
+                             order if order.size else None)
+        n_clusters = max(2, int(round(n * len(index) / size)))
+    out = np.empty((len(seeds), 4))
+    for r, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        if design == "srs":
+            idx = rng.choice(size, n, replace=False)
+            est, se = _srs_result(values, idx)
+        elif design == "stratified":
+            idx, n_h = stratified_sample(_ATTACHED["strata"], n, rng=rng)
+            est, se = stratified_mean(values, _ATTACHED["strata"], idx, n_h)
+        elif design == "systematic":
+            step = size / n
+            idx = np.minimum(np.floor(rng.uniform(0, step) + np.arange(n) * step), size - 1).astype(np.int64)
+            est, se = _srs_result(values, idx)
+        elif design == "cluster":
+            idx, cluster_of_row, selected = two_stage_sample(index, n_clusters, rng=rng)
+            res = cluster_mean(values[idx], cluster_of_row, index, selected)
+            est, se = res["mean"], res["se"]
+        else:
+            raise ValueError(f"Unknown design: {design!r} (choose from {DESIGNS})")
+        out[r] = est, se, idx.size, np.unique(clusters[idx]).size
+    return out
+
+
+def compare_designs(values, strata, clusters, n: int, repetitions: int = 2000,
+                    designs: Sequence[str] = DESIGNS, unit_cost: float = 1.0, cluster_cost: float = 20.0,
+                    seed: Union[None, int, RNGRegistry] = None, n_jobs: Optional[int] = None) -> pd.DataFrame:
+    """Run every design `repetitions` times and summarize bias, RMSE, coverage and cost."""
+    values = np.asarray(values, dtype=float)
+    if not 1 <= n <= values.size:
+        raise ValueError(f"n must be between 1 and the population size {values.size}, got {n}.")
+    strata = pd.factorize(np.asarray(strata))[0].astype(np.int64)
+    clusters = pd.factorize(np.asarray(clusters))[0].astype(np.int64)
+    index = ClusterIndex.from_labels(clusters)
+    truth = float(values.mean())
+    n_jobs = max(1, n_jobs or os.cpu_count() or 1)
+
+    arrays = {"values": values, "strata": strata, "clusters": clusters,
+              "index_ids": index.ids, "index_starts": index.starts, "index_counts": index.counts,
+              "index_order": index.order if index.order is not None else np.empty(0, dtype=np.int64)}
+    streams = registry(seed)
+    raw = {}
+    with SharedPopulation(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach, initargs=(shared.spec(),)) as pool:
+            futures = {}
+            for design in designs:
+                rep_seeds = streams.seed_sequences("design_comparison", design, count=repetitions)
+                chunks = [c for c in np.array_split(np.arange(repetitions), n_jobs) if c.size]
+                futures[design] = [pool.submit(_run_design, design, n, [rep_seeds[i] for i in c]) for c in chunks]
+            for design, fs in futures.items():
+                raw[design] = np.concatenate([f.result() for f in fs])
+
+    rows = []
+    for design, res in raw.items():
+        est, se, units, visited = res.T
+        bias = est.mean() - truth
+        emp_se = est.std(ddof=1)
+        cost = unit_cost * units + cluster_cost * visited
+        rows.append({"design": design, "mean_units": units.mean(), "bias": bias, "emp_se": emp_se,
+                     "rmse": float(np.sqrt(bias ** 2 + emp_se ** 2)), "mean_est_se": np.nanmean(se),
+                     "coverage": np.mean(np.abs(est - truth) <= 1.96 * se),
+                     "cost": cost.mean(), "cost_per_unit": (cost / units).mean()})
+    table = pd.DataFrame(rows).set_index("design")
+    if "srs" in table.index:
+        value = table["rmse"] ** 2 * table["cost"]
+        table["efficiency"] = value["srs"] / value
+    return table
+
+
+def load_population(path: str, value: str, strata: str, cluster: str) -> pd.DataFrame:
+    """Read only the needed columns of a population CSV."""
+    return pd.read_csv(path, usecols=[value, strata, cluster])
+
+
+def generate_population(size: int, n_strata: int = 10, n_clusters: int = 2000,
+                        seed: Union[None, int, RNGRegistry] = None) -> pd.DataFrame:
+    """Synthetic spend: clusters nested in strata, rows ordered by cluster (like a region-sorted file)."""
+    rng = registry(seed).stream("generate_population")
+    cluster = np.sort(rng.integers(0, n_clusters, size))
+    stratum = cluster * n_strata // n_clusters
+    spend = rng.lognormal(3.0 + 0.08 * stratum + rng.normal(0, 0.15, n_clusters)[cluster], 0.6)
+    return pd.DataFrame({"Spend": spend, "Region": stratum, "Neighborhood": cluster})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare sampling designs by repeated simulation.")
+    ap.add_argument("--csv", default=None, help="population CSV (default: generated data)")
+    ap.add_argument("--value", default="Spend", help="column to estimate the mean of")
+    ap.add_argument("--strata", default="Region", help="stratum column")
+    ap.add_argument("--cluster", default="Neighborhood", help="cluster column")
+    ap.add_argument("--population", type=int, default=1_000_000, help="generated population size")
+    ap.add_argument("--n", type=int, default=2000, help="units per sample")
+    ap.add_argument("--repetitions", type=int, default=2000, help="samples per design")
+    ap.add_argument("--unit-cost", type=float, default=1.0, help="cost per sampled unit")
+    ap.add_argument("--cluster-cost", type=float, default=20.0, help="cost per distinct cluster visited")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--out", default=None, help="optional CSV for the summary table")
+    ap.add_argument("--seed", type=int, default=42, help="random seed")
+    args = ap.parse_args()
+
+    if args.csv:
+        pop = load_population(args.csv, args.value, args.strata, args.cluster)
+    else:
+        pop = generate_population(args.population, seed=args.seed)
+    print(f"Population: {len(pop):,} rows, mean {args.value} = {pop[args.value].mean():.4f}")
+
+    t0 = time.perf_counter()
+    table = compare_designs(pop[args.value], pop[args.strata], pop[args.cluster], args.n, args.repetitions,
+                            unit_cost=args.unit_cost, cluster_cost=args.cluster_cost,
+                            seed=args.seed, n_jobs=args.jobs)
+    print(f"{args.repetitions:,} repetitions x {len(table)} designs in {time.perf_counter() - t0:.1f}s")
+    print(table.round(4).to_string())
+    if args.out:
+        table.to_csv(args.out)
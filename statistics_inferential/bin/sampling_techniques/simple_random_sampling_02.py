@@ -4,11 +4,18 @@ This technique selects samples randomly from the entire population, giving each
 
 Real-World Scenario: A retail company surveys customer satisfaction from a database of 1000 customers to infer overall satisfaction ratings (scale 1-10). This helps estimate population mean with a confidence interval for marketing decisions.
 """
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sampling_techniques.bootstrap import bootstrap  # noqa: E402
+
 # Generate synthetic population data: 1000 customers with satisfaction scores (1-10)
 np.random.seed(42)
 population_size = 1000
@@ -50,6 +57,8 @@ else:
     ci_upper = float(confidence_interval[1])
 
 print(f"95% Confidence Interval: ({ci_lower:.2f}, {ci_upper:.2f})")
+boot = bootstrap(sample_data, 'mean', n_resamples=5000, interval='bca', seed=42)
+print(f"95% Bootstrap BCa Interval: ({boot['ci_low']:.2f}, {boot['ci_high']:.2f})")
 print("Interpretation: This interval likely contains the true population mean, aiding decisions like service improvements.")
 
 # Visualize
@@ -5,12 +5,20 @@ This divides the population into strata (subgroups) and samples proportionally f
 Real-World Scenario: A hospital analyzes patient recovery times stratified by age groups (young, middle, senior) from 900 patients. This reduces bias in inferring average recovery time for treatment planning.
 """
 
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split  # For stratified sampling
 from scipy import stats
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sampling_techniques.stratified_sampler import stratified_sample  # noqa: E402
+from statistics_inferential.bin.sampling_techniques.bootstrap import bootstrap  # noqa: E402
+
 # Generate synthetic population: 900 patients with age groups and recovery times (days)
 np.random.seed(42)
 population_size = 900
@@ -26,13 +34,17 @@ print(f"Population Mean Recovery Time: {pop_mean:.2f} days")
 
 # Stratified Sampling: Sample 150 total, proportional to strata
 sample_size = 150
-sample = population.groupby('AgeGroup', group_keys=False).apply(lambda x: x.sample(frac=sample_size/population_size))
+age_codes, _ = pd.factorize(population['AgeGroup'])
+sample_idx, _ = stratified_sample(age_codes, n=sample_size, method='proportional', rng=42)
+sample = population.iloc[sample_idx]
 
 # Sample stats
 sample_mean = sample['RecoveryTime'].mean()
-confidence_interval = stats.t.interval(0.95, df=len(sample)-1, loc=sample_mean, scale=stats.sem(sample))
+confidence_interval = stats.t.interval(0.95, df=len(sample)-1, loc=sample_mean, scale=stats.sem(sample['RecoveryTime']))
 print(f"Sample Mean Recovery Time: {sample_mean:.2f} days")
 print(f"95% Confidence Interval: ({confidence_interval[0]:.2f}, {confidence_interval[1]:.2f})")
+boot = bootstrap(sample['RecoveryTime'].to_numpy(), 'mean', n_resamples=5000, strata=age_codes[sample_idx], seed=42)
+print(f"95% Stratified Bootstrap BCa Interval: ({boot['ci_low']:.2f}, {boot['ci_high']:.2f})")
 print("Interpretation: Stratification ensures age groups are represented, leading to more accurate inferences for targeted healthcare.")
 
 # Visualize strata distribution
@@ -4,11 +4,18 @@ This selects every k-th element from a list, starting from a random point. It's
 
 Real-World Scenario: A manufacturing firm samples every 10th product from a production line of 800 items to infer defect rates for quality control reporting.
 """
+import sys
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 import matplotlib.pyplot as plt
 
+if __package__ in (None, ""):  # run as a file rather than with python -m
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from statistics_inferential.bin.sampling_techniques.bootstrap import bootstrap  # noqa: E402
+
 # Generate synthetic population: 800 products with defect rates (0=no defect, 1=defect)
 np.random.seed(42)
 population_size = 800
@@ -32,6 +39,8 @@ sample_defect_rate = sample['Defect'].mean() * 100
 confidence_interval = stats.t.interval(0.95, df=len(sample)-1, loc=sample_defect_rate, scale=stats.sem(sample['Defect']) * 100)
 print(f"Sample Defect Rate: {sample_defect_rate:.2f}%")
 print(f"95% Confidence Interval: ({confidence_interval[0]:.2f}, {confidence_interval[1]:.2f})")
+boot = bootstrap(sample['Defect'].to_numpy(), 'proportion', n_resamples=5000, interval='bca', seed=42)
+print(f"95% Bootstrap BCa Interval: ({boot['ci_low'] * 100:.2f}, {boot['ci_high'] * 100:.2f})")
 print("Interpretation: Useful for assembly lines; interval estimates true defect rate, informing production adjustments.")
 
 # Visualize